@@ -60,7 +60,6 @@ def install_dependencies():
         "faster-whisper",
         "ffmpeg-python", 
         "pydub",
-        "torch",
         "ttkthemes"  # 可选依赖
     ]
     
@@ -100,8 +99,12 @@ def check_dependencies():
         if current_dir not in sys.path:
             sys.path.insert(0, current_dir)
         
-        from autoseg import check_dependencies
-        return check_dependencies()
+        # Only the lightweight engine is needed to look for the packages
+        from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies
+        missing = find_missing_dependencies(GUI_DEPENDENCIES)
+        if missing:
+            print_colored(f"缺少: {', '.join(missing)}", 'yellow')
+        return not missing
     except ImportError as e:
         print_colored(f"[警告] 无法导入依赖检查模块: {e}", 'yellow')
         return False
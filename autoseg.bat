@@ -46,7 +46,7 @@ for /f "tokens=*" %%i in ('python --version 2^>^&1') do echo [信息] %%i
 
 :: 检查依赖库
 echo [信息] 检查依赖库...
-python -c "from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" >nul 2>&1
+python -c "import sys; from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" >nul 2>&1
 
 if errorlevel 1 (
     echo [警告] 发现缺少依赖库
@@ -60,10 +60,10 @@ if errorlevel 1 (
     )
     
     echo [信息] 正在安装依赖库...
-    pip install faster-whisper ffmpeg-python pydub torch ttkthemes
+    pip install faster-whisper ffmpeg-python pydub ttkthemes
     
     echo [信息] 重新检查依赖库...
-    python -c "from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" >nul 2>&1
+    python -c "import sys; from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" >nul 2>&1
     if errorlevel 1 (
         echo [错误] 依赖库安装失败
         pause
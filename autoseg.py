@@ -1,88 +1,46 @@
+import sys
+
+# 命令行批处理模式 (python -m autoseg <文件...>) 不需要 Tk 界面，必须在导入
+# tkinter 之前分发，否则在未安装 python3-tk 的服务器上会直接失败。
+# 通过 runpy 以 __main__ 身份运行 autoseg_cli，这样多进程 (spawn) 的子进程
+# 只会重新导入 autoseg_cli，而不会再次执行本 GUI 模块。
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import runpy
+    runpy.run_module("autoseg_cli", run_name="__main__", alter_sys=True)
+    sys.exit(0)
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
 import queue
 import os
-import tempfile
-import time
+import importlib.util
 import logging
-import sys
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 import traceback
 
-# Configure logging
-def setup_logging() -> logging.Logger:
-    """Set up logging configuration for the application."""
-    # Create logs directory if it doesn't exist
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-
-    # Configure logging with rotation
-    log_file = log_dir / "autoseg.log"
-
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
-    )
-
-    # Create logger
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.INFO)
-
-    # Avoid duplicate handlers
-    if not logger.handlers:
-        # File handler with rotation
-        try:
-            from logging.handlers import RotatingFileHandler
-            file_handler = RotatingFileHandler(
-                log_file, maxBytes=10*1024*1024, backupCount=5  # 10MB max, 5 backups
-            )
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        except Exception:
-            # Fallback to basic file handler
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
-    return logger
+from autoseg_engine import (
+    SUPPORTED_FORMATS, MODEL_SIZES, COMPUTE_TYPES,
+    GUI_DEPENDENCIES, setup_logging, find_missing_dependencies, detect_devices, default_compute_type,
+    format_progress, write_txt, write_srt, format_result_row
+)
+from autoseg_audio import SAMPLE_RATE, PCMStore
+from autoseg_cache import TranscriptionCache, AudioCache
+from autoseg_models import DEFAULT_POOL_BYTES
+from autoseg_settings import load_settings, save_settings
+from autoseg_segmentation import SEGMENTATION_MODES
+from autoseg_metrics import MetricsRecorder, DEFAULT_METRICS_DIR
+from autoseg_worker import TranscriptionWorker, CANCEL_GRACE_SECONDS
+from autoseg_batch import default_threads_per_worker
+from autoseg_tuning import load_tuned_config, describe_config
 
 logger = setup_logging()
 
 # --- 依赖项检查 ---
 def check_dependencies() -> bool:
     """Check if all required dependencies are available."""
-    missing_deps = []
-
-    try:
-        from faster_whisper import WhisperModel
-    except ImportError:
-        missing_deps.append("faster-whisper")
-
-    try:
-        import ffmpeg
-    except ImportError:
-        missing_deps.append("ffmpeg-python")
-
-    try:
-        from pydub import AudioSegment
-        from pydub.playback import play
-    except ImportError:
-        missing_deps.append("pydub")
-
-    try:
-        import torch
-    except ImportError:
-        missing_deps.append("torch")
+    missing_deps = find_missing_dependencies(GUI_DEPENDENCIES)
 
     if missing_deps:
         error_msg = (
@@ -96,26 +54,24 @@ def check_dependencies() -> bool:
 
     return True
 
-# Check dependencies before proceeding
-if not check_dependencies():
-    sys.exit(1)
+# 任务队列中各状态的显示文本
+JOB_STATUS_LABELS = {
+    "pending": "等待中",
+    "running": "处理中",
+    "done": "完成",
+    "failed": "失败",
+    "cancelled": "已取消",
+}
 
-# Import dependencies after checking
-from faster_whisper import WhisperModel
-import ffmpeg
-from pydub import AudioSegment
-from pydub.playback import play
-import torch
+# 分块并行数的上限
+MAX_CHUNK_WORKERS = 16
 
 # --- 应用主类 ---
 class AutoSegmenterApp:
     """Advanced Auto Segmenter application for audio/video transcription and segmentation."""
 
     # Supported file formats
-    SUPPORTED_FORMATS = {
-        'audio': ['.mp3', '.wav', '.m4a', '.flac', '.aac', '.ogg'],
-        'video': ['.mp4', '.mov', '.avi', '.mkv', '.webm']
-    }
+    SUPPORTED_FORMATS = SUPPORTED_FORMATS
 
     def __init__(self, root: tk.Tk):
         """Initialize the application.
@@ -132,8 +88,8 @@ class AutoSegmenterApp:
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         # --- 成员变量初始化 ---
-        self.file_path = tk.StringVar()
         self.max_duration = tk.IntVar(value=60)
+        self.segmentation_mode = tk.StringVar(value="greedy")
         self.language_code = tk.StringVar()
 
         # Model and Transcription settings
@@ -142,15 +98,47 @@ class AutoSegmenterApp:
         self.compute_type = tk.StringVar()
         self.use_vad = tk.BooleanVar(value=True)
         self.beam_size = tk.IntVar(value=5)
-
-        # Threading and processing
-        self.processing_thread: Optional[threading.Thread] = None
-        self.result_queue: queue.Queue = queue.Queue()
-        self.full_audio: Optional[AudioSegment] = None
-        self.segments_data: List[Dict[str, Any]] = []
-        self.model: Optional[WhisperModel] = None
+        self.model_pool_gb = tk.IntVar(value=DEFAULT_POOL_BYTES // 1024 ** 3)
+        self.preload_model = tk.BooleanVar(value=True)
+        self.chunk_workers = tk.IntVar(value=1)  # Long files as parallel chunks, 1 = off
+        self.prometheus_file: Optional[str] = None  # Only set by editing settings.json
+
+        # Processing
+        self.pcm_store: Optional[PCMStore] = None  # Memory-mapped preview audio of the viewed job
+        self.segments_data: List[Dict[str, Any]] = []  # Segments of the viewed job
+
+        # Job queue: files run back to back in list order; each job keeps its own results
+        self.jobs: List[Dict[str, Any]] = []
+        self.next_job_id = 1
+        self.running_job: Optional[Dict[str, Any]] = None
+        self.viewed_job: Optional[Dict[str, Any]] = None  # Job shown in the results area
+        self.follow_running_job = True  # Switch the results area to each job as it starts
+        self.queue_active = False  # Start the next pending job when one finishes
+        self.failed_jobs: List[Dict[str, Any]] = []  # Failures of the current queue run
+        self.model_info: Optional[Dict[str, str]] = None  # size/device/compute_type of the loaded model
+        self.resident_models = 0
+        # Models and the whole pipeline live in a child process that owns them;
+        # restarting it gives all of their memory back
+        self.worker = TranscriptionWorker()
         self.is_processing = False
-        self.temp_files: List[str] = []  # Track temporary files for cleanup
+        self.is_loading_model = False
+
+        # Re-opening a file with unchanged settings reuses the previous transcription
+        try:
+            self.transcription_cache: Optional[TranscriptionCache] = TranscriptionCache()
+        except Exception as e:
+            logger.warning(f"Transcription cache disabled: {e}")
+            self.transcription_cache = None
+
+        # Re-opening the same media skips the ffmpeg conversion
+        try:
+            self.audio_cache: Optional[AudioCache] = AudioCache()
+        except Exception as e:
+            logger.warning(f"Decoded-audio cache disabled: {e}")
+            self.audio_cache = None
+
+        # Per-job step timings; written from the worker threads
+        self.metrics_recorder = MetricsRecorder(DEFAULT_METRICS_DIR)
 
         try:
             # --- 创建 GUI 界面 ---
@@ -160,6 +148,12 @@ class AutoSegmenterApp:
             # --- 初始化硬件设置 ---
             self.init_hardware_options()
 
+            # --- 恢复上次的设置，并在后台预加载上次使用的模型 ---
+            settings = load_settings()
+            self.apply_settings(settings)
+            if "model_size" in settings and self.preload_model.get():
+                self.root.after(200, lambda: self.load_model(preload=True))
+
             logger.info("Application initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize application: {e}")
@@ -169,8 +163,12 @@ class AutoSegmenterApp:
     def on_closing(self) -> None:
         """Handle application closing with proper cleanup."""
         try:
-            if self.is_processing and self.processing_thread and self.processing_thread.is_alive():
+            self.save_current_settings()
+            if self.is_processing:
                 if messagebox.askokcancel("退出确认", "正在处理文件，确定要退出吗？"):
+                    # Stop ffmpeg and inference instead of leaving them running until exit
+                    self.queue_active = False
+                    self.worker.cancel(self.running_job["id"])
                     self.cleanup_resources()
                     self.root.destroy()
             else:
@@ -181,18 +179,18 @@ class AutoSegmenterApp:
             self.root.destroy()
 
     def cleanup_resources(self) -> None:
-        """Clean up temporary files and resources."""
+        """Release the preview audio and stop the worker process."""
         try:
-            # Clean up temporary files
-            for temp_file in self.temp_files:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-                    logger.info(f"Cleaned up temporary file: {temp_file}")
-            self.temp_files.clear()
+            # Release the memory-mapped audio of every job and its backing file
+            for job in self.jobs:
+                if job["audio"] is not None:
+                    job["audio"].close()
+                    job["audio"] = None
+            self.pcm_store = None
+            self.segments_data = []
 
-            # Clear audio data
-            self.full_audio = None
-            self.segments_data.clear()
+            # Waits briefly for a cancelled job, then terminates the worker
+            self.worker.stop(timeout=1.0)
 
             logger.info("Resources cleaned up successfully")
         except Exception as e:
@@ -260,10 +258,10 @@ class AutoSegmenterApp:
         row1 = ttk.Frame(model_frame)
         row1.pack(fill=tk.X, pady=2)
         ttk.Label(row1, text="模型大小:", width=15).pack(side=tk.LEFT)
-        model_combo = ttk.Combobox(row1, textvariable=self.model_size, values=[
-            "tiny", "base", "small", "medium", "large-v1", "large-v2", "large-v3"
-        ])
+        model_combo = ttk.Combobox(row1, textvariable=self.model_size, values=MODEL_SIZES)
         model_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        # Each model size has its own tuned compute type
+        model_combo.bind("<<ComboboxSelected>>", self.update_compute_types)
         self.model_config_widgets.append(model_combo)
 
         # Device
@@ -282,7 +280,27 @@ class AutoSegmenterApp:
         self.compute_type_combo = ttk.Combobox(row3, textvariable=self.compute_type)
         self.compute_type_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.model_config_widgets.append(self.compute_type_combo)
-        
+
+        # Memory budget for resident models
+        row4 = ttk.Frame(model_frame)
+        row4.pack(fill=tk.X, pady=2)
+        ttk.Label(row4, text="模型内存上限 (GB):", width=15).pack(side=tk.LEFT)
+        pool_spinbox = ttk.Spinbox(row4, from_=1, to=256, textvariable=self.model_pool_gb, width=5)
+        pool_spinbox.pack(side=tk.LEFT)
+        ttk.Label(row4, text="（已加载的模型常驻内存，超出上限时卸载最久未用的模型）").pack(side=tk.LEFT, padx=(5, 0))
+        self.model_config_widgets.append(pool_spinbox)
+
+        # Chunked transcription of long files, like --chunk-workers
+        row5 = ttk.Frame(model_frame)
+        row5.pack(fill=tk.X, pady=2)
+        ttk.Label(row5, text="分块并行数:", width=15).pack(side=tk.LEFT)
+        chunk_spinbox = ttk.Spinbox(row5, from_=1, to=MAX_CHUNK_WORKERS, textvariable=self.chunk_workers, width=5)
+        chunk_spinbox.pack(side=tk.LEFT)
+        ttk.Label(row5, text="（长文件在静音处切块并行识别，1 表示不分块）").pack(side=tk.LEFT, padx=(5, 0))
+        self.model_config_widgets.append(chunk_spinbox)
+
+        ttk.Checkbutton(model_frame, text="启动时自动加载上次使用的模型", variable=self.preload_model).pack(anchor=tk.W, pady=2)
+
         # Load Model Button
         self.load_model_button = ttk.Button(model_frame, text="加载模型", command=self.load_model, style="Accent.TButton")
         self.load_model_button.pack(fill=tk.X, pady=(10, 5), ipady=5)
@@ -292,12 +310,28 @@ class AutoSegmenterApp:
         settings_frame = ttk.LabelFrame(main_frame, text="第二步：文件与转录设置", padding="10")
         settings_frame.pack(fill=tk.X, pady=5)
 
-        # File Selection
-        file_row = ttk.Frame(settings_frame)
-        file_row.pack(fill=tk.X, pady=5)
-        ttk.Label(file_row, text="文件路径:", width=15).pack(side=tk.LEFT)
-        ttk.Entry(file_row, textvariable=self.file_path, state="readonly").pack(side=tk.LEFT, fill=tk.X, expand=True)
-        ttk.Button(file_row, text="浏览...", command=self.browse_file).pack(side=tk.LEFT, padx=(5, 0))
+        # Job queue
+        queue_row = ttk.Frame(settings_frame)
+        queue_row.pack(fill=tk.X, pady=5)
+        ttk.Label(queue_row, text="任务队列:", width=15).pack(side=tk.LEFT, anchor=tk.N)
+        queue_buttons = ttk.Frame(queue_row)
+        queue_buttons.pack(side=tk.RIGHT, fill=tk.Y, padx=(5, 0))
+        ttk.Button(queue_buttons, text="添加文件...", command=self.browse_file).pack(fill=tk.X)
+        ttk.Button(queue_buttons, text="上移", command=lambda: self.move_job(-1)).pack(fill=tk.X, pady=(2, 0))
+        ttk.Button(queue_buttons, text="下移", command=lambda: self.move_job(1)).pack(fill=tk.X, pady=(2, 0))
+        ttk.Button(queue_buttons, text="优先处理", command=self.prioritize_job).pack(fill=tk.X, pady=(2, 0))
+        ttk.Button(queue_buttons, text="移除", command=self.remove_job).pack(fill=tk.X, pady=(2, 0))
+        self.job_tree = ttk.Treeview(queue_row, columns=("file", "status"), show="headings",
+                                     selectmode="browse", height=5)
+        self.job_tree.heading("file", text="文件")
+        self.job_tree.heading("status", text="状态")
+        self.job_tree.column("file", width=400, stretch=True)
+        self.job_tree.column("status", width=120, anchor=tk.CENTER, stretch=False)
+        job_scrollbar = ttk.Scrollbar(queue_row, command=self.job_tree.yview)
+        self.job_tree.config(yscrollcommand=job_scrollbar.set)
+        job_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.job_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.job_tree.bind("<<TreeviewSelect>>", self.on_job_selected)
 
         # Language
         lang_row = ttk.Frame(settings_frame)
@@ -321,25 +355,65 @@ class AutoSegmenterApp:
         ttk.Label(duration_frame, text="最大段长 (秒):", width=15).pack(side=tk.LEFT)
         ttk.Scale(duration_frame, from_=10, to=120, orient=tk.HORIZONTAL, variable=self.max_duration, command=lambda s: self.max_duration.set(int(float(s)))).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         ttk.Label(duration_frame, textvariable=self.max_duration, width=4).pack(side=tk.LEFT)
+
+        # Segmentation mode
+        mode_row = ttk.Frame(settings_frame)
+        mode_row.pack(fill=tk.X, pady=5)
+        ttk.Label(mode_row, text="分段方式:", width=15).pack(side=tk.LEFT)
+        self.segmentation_combo = ttk.Combobox(mode_row, textvariable=self.segmentation_mode,
+                                               values=SEGMENTATION_MODES, state="readonly", width=10)
+        self.segmentation_combo.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Label(mode_row, text="（greedy 边识别边分段；optimal 整体优化，段长更均匀）").pack(side=tk.LEFT)
         
         # --- 3. 控制区 ---
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=10)
-        self.start_button = ttk.Button(control_frame, text="开始处理文件", command=self.start_processing, state="disabled")
+        self.start_button = ttk.Button(control_frame, text="开始处理队列", command=self.start_processing, state="disabled")
         self.start_button.pack(side=tk.LEFT, fill=tk.X, expand=True, ipady=5)
+        self.cancel_button = ttk.Button(control_frame, text="取消处理", command=self.cancel_processing, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=(5, 0))
         self.reset_button = ttk.Button(control_frame, text="更换模型", command=self.reset_model_config, state="disabled")
         self.reset_button.pack(side=tk.LEFT, padx=5)
+        self.release_button = ttk.Button(control_frame, text="释放模型", command=self.release_models)
+        self.release_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.clear_cache_button = ttk.Button(control_frame, text="清除缓存", command=self.clear_transcription_cache)
+        self.clear_cache_button.pack(side=tk.LEFT)
         self.save_button = ttk.Button(control_frame, text="导出为 TXT", command=self.save_to_txt, state="disabled")
         self.save_button.pack(side=tk.RIGHT, ipady=5)
 
         # --- 4. 结果展示区 ---
         result_frame = ttk.LabelFrame(main_frame, text="处理结果", padding="10")
         result_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        self.result_text = tk.Text(result_frame, wrap="word", height=15, state="disabled")
-        scrollbar = ttk.Scrollbar(result_frame, command=self.result_text.yview)
-        self.result_text.config(yscrollcommand=scrollbar.set)
+        result_header = ttk.Frame(result_frame)
+        result_header.pack(fill=tk.X, pady=(0, 5))
+        self.detected_lang_label = ttk.Label(result_header, text="")
+        self.detected_lang_label.pack(side=tk.LEFT)
+        # One shared play action for the selected row instead of a button per segment
+        self.play_button = ttk.Button(result_header, text="▶️ 播放所选段落", command=self.play_selected_segment,
+                                      state="disabled")
+        self.play_button.pack(side=tk.RIGHT)
+
+        # Full text of the selected segment; the list only shows one line per segment
+        self.segment_text = tk.Text(result_frame, wrap="word", height=4, state="disabled")
+        self.segment_text.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
+
+        # Treeview rows are plain records and only the visible ones are drawn,
+        # so thousands of segments cost no extra widgets
+        self.result_tree = ttk.Treeview(result_frame, columns=("number", "time", "text"), show="headings",
+                                        selectmode="browse", height=12)
+        self.result_tree.heading("number", text="#")
+        self.result_tree.heading("time", text="时间")
+        self.result_tree.heading("text", text="文本")
+        self.result_tree.column("number", width=50, anchor=tk.E, stretch=False)
+        self.result_tree.column("time", width=190, anchor=tk.CENTER, stretch=False)
+        self.result_tree.column("text", width=500, stretch=True)
+        scrollbar = ttk.Scrollbar(result_frame, command=self.result_tree.yview)
+        self.result_tree.config(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.result_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.result_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.result_tree.bind("<<TreeviewSelect>>", self.show_selected_segment)
+        self.result_tree.bind("<Double-1>", self.play_selected_segment)
+        self.result_tree.bind("<Return>", self.play_selected_segment)
 
         # --- 5. 状态栏 ---
         status_frame = ttk.Frame(main_frame, padding=(0, 5))
@@ -352,19 +426,8 @@ class AutoSegmenterApp:
     def init_hardware_options(self) -> None:
         """检测硬件并设置默认选项"""
         try:
-            devices = ["cpu"]
-
-            # Check CUDA availability
-            if torch.cuda.is_available():
-                devices.append("cuda")
-                gpu_count = torch.cuda.device_count()
-                gpu_name = torch.cuda.get_device_name(0) if gpu_count > 0 else "Unknown"
-                self.device.set("cuda")
-                logger.info(f"CUDA available: {gpu_count} GPU(s), Primary: {gpu_name}")
-            else:
-                self.device.set("cpu")
-                logger.info("CUDA not available, using CPU")
-
+            devices = detect_devices()
+            self.device.set("cuda" if "cuda" in devices else "cpu")
             self.device_combo['values'] = devices
             self.update_compute_types()
 
@@ -376,19 +439,73 @@ class AutoSegmenterApp:
             self.update_compute_types()
 
     def update_compute_types(self, event=None):
-        """根据设备更新可用的计算精度"""
+        """根据设备更新可用的计算精度，优先使用本机自动调优的结果"""
         device = self.device.get()
-        if device == "cuda":
-            # 对于 Ampere 及更高版本的 GPU，int8_float16 是一个很好的选择
-            types = ["float16", "int8_float16", "int8"]
-            self.compute_type.set("float16")
-        else: # cpu
-            types = ["int8", "int16", "float32"]
-            self.compute_type.set("int8")
-        self.compute_type_combo['values'] = types
-
-    def load_model(self) -> None:
-        """启动模型加载线程"""
+        tuned = load_tuned_config(self.model_size.get(), device)
+        self.compute_type.set(tuned["compute_type"] if tuned else default_compute_type(device))
+        self.compute_type_combo['values'] = COMPUTE_TYPES.get(device, COMPUTE_TYPES['cpu'])
+
+    def apply_settings(self, settings: Dict[str, Any]) -> None:
+        """Restore saved settings, ignoring values that no longer apply on this machine."""
+        if settings.get("model_size") in MODEL_SIZES:
+            self.model_size.set(settings["model_size"])
+        if settings.get("device") in self.device_combo['values']:
+            self.device.set(settings["device"])
+        # Compute types of the restored device, and the tuned one of the restored size
+        self.update_compute_types()
+        # A tuned configuration takes precedence over the compute type last used
+        if (settings.get("compute_type") in self.compute_type_combo['values']
+                and load_tuned_config(self.model_size.get(), self.device.get()) is None):
+            self.compute_type.set(settings["compute_type"])
+        if "language" in settings:
+            self.language_code.set(settings["language"])
+        if "use_vad" in settings:
+            self.use_vad.set(settings["use_vad"])
+        if 1 <= settings.get("beam_size", 0) <= 20:
+            self.beam_size.set(settings["beam_size"])
+        if 10 <= settings.get("max_duration", 0) <= 300:
+            self.max_duration.set(settings["max_duration"])
+        if settings.get("segmentation") in SEGMENTATION_MODES:
+            self.segmentation_mode.set(settings["segmentation"])
+        if settings.get("model_pool_gb", 0) >= 1:
+            self.model_pool_gb.set(settings["model_pool_gb"])
+        if "preload_model" in settings:
+            self.preload_model.set(settings["preload_model"])
+        if 1 <= settings.get("chunk_workers", 0) <= MAX_CHUNK_WORKERS:
+            self.chunk_workers.set(settings["chunk_workers"])
+        if settings.get("prometheus_file"):
+            self.prometheus_file = settings["prometheus_file"]
+            self.metrics_recorder = MetricsRecorder(DEFAULT_METRICS_DIR, Path(self.prometheus_file).expanduser())
+
+    def save_current_settings(self) -> None:
+        """Persist the current model and transcription settings for the next launch."""
+        try:
+            settings = {
+                "model_size": self.model_size.get(),
+                "device": self.device.get(),
+                "compute_type": self.compute_type.get(),
+                "language": self.language_code.get().strip(),
+                "use_vad": self.use_vad.get(),
+                "beam_size": self.beam_size.get(),
+                "max_duration": self.max_duration.get(),
+                "segmentation": self.segmentation_mode.get(),
+                "model_pool_gb": self.model_pool_gb.get(),
+                "preload_model": self.preload_model.get(),
+                "chunk_workers": self.chunk_workers.get(),
+            }
+            if self.prometheus_file:
+                settings["prometheus_file"] = self.prometheus_file
+            save_settings(settings)
+        except tk.TclError as e:
+            # A spinbox holding a non-number; keep the previous file
+            logger.warning(f"Settings not saved: {e}")
+
+    def load_model(self, preload: bool = False) -> None:
+        """启动模型加载线程
+
+        Args:
+            preload: Started automatically at launch from the saved settings
+        """
         try:
             # Validate settings before loading
             if not self.model_size.get():
@@ -403,70 +520,103 @@ class AutoSegmenterApp:
                 messagebox.showerror("配置错误", "请选择计算精度")
                 return
 
+            try:
+                pool_bytes = int(self.model_pool_gb.get()) * 1024 ** 3
+            except (tk.TclError, ValueError):
+                messagebox.showerror("配置错误", "模型内存上限必须是整数")
+                return
+
+            try:
+                chunk_workers = int(self.chunk_workers.get())
+            except (tk.TclError, ValueError):
+                chunk_workers = 0
+            if not 1 <= chunk_workers <= MAX_CHUNK_WORKERS:
+                messagebox.showerror("配置错误", f"分块并行数必须是 1 到 {MAX_CHUNK_WORKERS} 之间的整数")
+                return
+
             self.toggle_model_config_widgets(False)
             self.progress_bar.start()
-            self.update_status("正在加载模型，请稍候...")
+            self.is_loading_model = True
+            if preload:
+                self.update_status(f"正在后台预加载上次使用的模型 '{self.model_size.get()}'，可先选择文件...")
+            else:
+                self.update_status("正在加载模型，请稍候...")
 
             logger.info(f"Loading model: {self.model_size.get()}, device: {self.device.get()}, compute_type: {self.compute_type.get()}")
 
-            threading.Thread(
-                target=self.load_model_thread,
-                args=(
-                    self.model_size.get(),
-                    self.device.get(),
-                    self.compute_type.get()
-                ),
-                daemon=True
-            ).start()
+            # One CTranslate2 worker per chunk decoded at once; the worker chunks long files only then
+            options = {}
+            if chunk_workers > 1:
+                options["num_workers"] = chunk_workers
+                options["cpu_threads"] = default_threads_per_worker(chunk_workers)
+            # Threads tuned for this compute type and chunk count on this machine, see `python -m autoseg --autotune`
+            tuned = load_tuned_config(self.model_size.get(), self.device.get(), streams=chunk_workers)
+            if tuned and tuned["compute_type"] == self.compute_type.get() and tuned["cpu_threads"]:
+                logger.info(f"Using tuned configuration: {describe_config(tuned)}")
+                options["cpu_threads"] = tuned["cpu_threads"]
+
+            self.worker.load_model(self.model_size.get(), self.device.get(), self.compute_type.get(), pool_bytes,
+                                   options)
 
         except Exception as e:
             logger.error(f"Error starting model loading: {e}")
             self.progress_bar.stop()
+            self.is_loading_model = False
             self.toggle_model_config_widgets(True)
             messagebox.showerror("加载错误", f"启动模型加载失败: {e}")
 
-    def load_model_thread(self, size: str, device: str, compute_type: str) -> None:
-        """在工作线程中加载模型"""
-        try:
-            logger.info(f"Loading Whisper model: size={size}, device={device}, compute_type={compute_type}")
-
-            # Load model with timeout handling
-            model = WhisperModel(
-                size,
-                device=device,
-                compute_type=compute_type,
-                download_root=None,  # Use default cache directory
-                local_files_only=False
-            )
-
-            logger.info("Model loaded successfully")
-            self.result_queue.put(("model_loaded", model))
-
-        except Exception as e:
-            error_msg = f"模型加载失败: {str(e)}"
-            logger.error(f"Model loading failed: {e}")
-            logger.error(traceback.format_exc())
-
-            # Provide more specific error messages
-            if "CUDA" in str(e) and "out of memory" in str(e).lower():
-                error_msg = "GPU内存不足，请尝试使用CPU或更小的模型"
-            elif "No module named" in str(e):
-                error_msg = f"缺少依赖库: {e}"
-            elif "Connection" in str(e) or "timeout" in str(e).lower():
-                error_msg = "网络连接问题，无法下载模型。请检查网络连接或使用本地模型"
-
-            self.result_queue.put(("error", error_msg))
-
     def reset_model_config(self):
         """重置模型配置，允许用户重新选择"""
-        self.model = None
+        # The model stays resident in the worker's pool, so selecting it again is instant
+        self.model_info = None
+        self.toggle_model_config_widgets(True)
+        self.start_button.config(state="disabled")
+        self.reset_button.config(state="disabled")
+        self.update_status(f"请重新配置并加载模型（{self.resident_models} 个模型常驻内存，切换无需重新加载）。")
+
+    def release_models(self) -> None:
+        """Unload every resident model and free its memory."""
+        if self.is_processing or self.is_loading_model:
+            messagebox.showwarning("提示", "正在处理中，请等待完成。")
+            return
+
+        self.model_info = None
+        self.resident_models = 0
+        # A fresh worker process is the surest way to return the memory to the OS
+        self.worker.release_models()
         self.toggle_model_config_widgets(True)
         self.start_button.config(state="disabled")
         self.reset_button.config(state="disabled")
         self.update_status("模型已卸载。请重新配置并加载模型。")
 
+    def clear_transcription_cache(self) -> None:
+        """Invalidate all cached transcriptions and decoded audio after confirmation."""
+        if self.transcription_cache is None and self.audio_cache is None:
+            messagebox.showinfo("提示", "缓存不可用")
+            return
+
+        lines = []
+        if self.transcription_cache is not None:
+            stats = self.transcription_cache.stats()
+            lines.append(f"{stats['entries']} 条转录结果 ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+        if self.audio_cache is not None:
+            stats = self.audio_cache.stats()
+            lines.append(f"{stats['entries']} 个已解码音频 ({stats['bytes'] / (1024 * 1024):.1f} MB)")
+        if not messagebox.askyesno("清除缓存", f"缓存中有 {'、'.join(lines)}。\n确定要全部清除吗？"):
+            return
+
+        try:
+            if self.transcription_cache is not None:
+                self.transcription_cache.clear()
+            if self.audio_cache is not None:
+                self.audio_cache.clear()
+            self.update_status("缓存已清除。")
+        except Exception as e:
+            logger.error(f"Failed to clear transcription cache: {e}")
+            messagebox.showerror("缓存错误", f"清除缓存失败: {e}")
+
     def browse_file(self) -> None:
-        """Browse and select an audio/video file."""
+        """Browse for audio/video files and add them to the job queue."""
         try:
             # Create file type filters
             audio_formats = " ".join(f"*{ext}" for ext in self.SUPPORTED_FORMATS['audio'])
@@ -480,30 +630,125 @@ class AutoSegmenterApp:
                 ("所有文件", "*.*")
             ]
 
-            path = filedialog.askopenfilename(
+            paths = filedialog.askopenfilenames(
                 title="选择音频或视频文件",
                 filetypes=filetypes
             )
 
-            if path and self.validate_file_path(path):
-                self.file_path.set(path)
-                file_size_mb = Path(path).stat().st_size / (1024 * 1024)
-                self.update_status(f"已选择文件: {os.path.basename(path)} ({file_size_mb:.1f} MB)")
-                logger.info(f"File selected: {path}")
+            added = [path for path in paths if self.validate_file_path(path)]
+            for path in added:
+                self.add_job(path)
+            if added:
+                self.update_status(f"已添加 {len(added)} 个文件到队列")
 
         except Exception as e:
             logger.error(f"Error browsing file: {e}")
             messagebox.showerror("文件选择错误", f"选择文件时发生错误: {e}")
 
+    def add_job(self, file_path: str) -> None:
+        """Append a file to the job queue; a running queue picks it up automatically."""
+        job = {
+            "id": self.next_job_id,
+            "file_path": file_path,
+            "status": "pending",
+            "detected_lang": None,
+            "segments": [],
+            "audio": None,  # PCMStore for playback, owned by the job
+            "error": None,
+        }
+        self.next_job_id += 1
+        self.jobs.append(job)
+        self.job_tree.insert("", tk.END, iid=str(job["id"]), values=(os.path.basename(file_path), ""))
+        self.update_job_row(job)
+        logger.info(f"Job added: {file_path}")
+
+    def find_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        for job in self.jobs:
+            if job["id"] == job_id:
+                return job
+        return None
+
+    def selected_job(self) -> Optional[Dict[str, Any]]:
+        selection = self.job_tree.selection()
+        return self.find_job(int(selection[0])) if selection else None
+
+    def update_job_row(self, job: Dict[str, Any]) -> None:
+        status = JOB_STATUS_LABELS[job["status"]]
+        if job["status"] == "done":
+            status += f" ({len(job['segments'])} 段)"
+        self.job_tree.set(str(job["id"]), "status", status)
+
+    def move_job(self, offset: int) -> None:
+        """Move the selected pending job up or down; pending jobs run in list order."""
+        job = self.selected_job()
+        if job is None or job["status"] != "pending":
+            return
+        index = self.jobs.index(job)
+        target = index + offset
+        if not 0 <= target < len(self.jobs):
+            return
+        self.jobs[index], self.jobs[target] = self.jobs[target], self.jobs[index]
+        self.job_tree.move(str(job["id"]), "", target)
+
+    def prioritize_job(self) -> None:
+        """Make the selected pending job the next one to run."""
+        job = self.selected_job()
+        if job is None or job["status"] != "pending":
+            return
+        self.jobs.remove(job)
+        first_pending = next((i for i, other in enumerate(self.jobs) if other["status"] == "pending"),
+                             len(self.jobs))
+        self.jobs.insert(first_pending, job)
+        self.job_tree.move(str(job["id"]), "", first_pending)
+
+    def remove_job(self) -> None:
+        """Remove the selected job unless it is running, releasing its audio."""
+        job = self.selected_job()
+        if job is None:
+            return
+        if job is self.running_job:
+            messagebox.showwarning("提示", "正在处理的任务不能移除，请先取消处理。")
+            return
+        self.jobs.remove(job)
+        self.job_tree.delete(str(job["id"]))
+        if job is self.viewed_job:
+            self.viewed_job = None
+            self.pcm_store = None
+            self.segments_data = []
+            self.clear_results_view()
+            self.update_save_button()
+        if job["audio"] is not None:
+            job["audio"].close()
+            job["audio"] = None
+
+    def on_job_selected(self, event=None) -> None:
+        """Show the results of the job selected in the queue."""
+        job = self.selected_job()
+        if job is None or job is self.viewed_job:
+            return
+        # Picking the running job resumes following the queue; any other job pins the view
+        self.follow_running_job = job is self.running_job
+        self.view_job(job)
+
+    def view_job(self, job: Dict[str, Any]) -> None:
+        """Show a job's results, as far as they go, in the results area."""
+        self.viewed_job = job
+        self.display_results(job)
+        if job["status"] == "failed":
+            self.segment_text.config(state="normal")
+            self.segment_text.insert(tk.END, job["error"] or "")
+            self.segment_text.config(state="disabled")
+        self.update_save_button()
+
     def start_processing(self) -> None:
-        """Start the audio processing workflow."""
+        """Start working through the pending jobs of the queue."""
         try:
             # Validation checks
-            if not self.file_path.get():
-                messagebox.showwarning("提示", "请先选择一个文件。")
+            if not any(job["status"] == "pending" for job in self.jobs):
+                messagebox.showwarning("提示", "请先添加待处理的文件。")
                 return
 
-            if not self.model:
+            if not self.model_info:
                 messagebox.showwarning("提示", "请先加载模型。")
                 return
 
@@ -511,10 +756,6 @@ class AutoSegmenterApp:
                 messagebox.showwarning("提示", "正在处理中，请等待完成。")
                 return
 
-            # Validate file again before processing
-            if not self.validate_file_path(self.file_path.get()):
-                return
-
             # Validate parameters
             if self.max_duration.get() < 10 or self.max_duration.get() > 300:
                 messagebox.showerror("参数错误", "最大段长必须在10-300秒之间")
@@ -524,297 +765,210 @@ class AutoSegmenterApp:
                 messagebox.showerror("参数错误", "Beam Size必须在1-20之间")
                 return
 
-            # Start processing
-            self.is_processing = True
+            self.save_current_settings()
+            self.queue_active = True
+            self.follow_running_job = True
+            self.failed_jobs = []
             self.toggle_processing_controls(False)
-            self.result_text.config(state="normal")
-            self.result_text.delete("1.0", tk.END)
-            self.result_text.config(state="disabled")
-            self.segments_data.clear()
-            self.progress_bar.start()
-
-            self.update_status("正在启动处理线程...")
-            logger.info(f"Starting processing: {self.file_path.get()}")
-
-            self.processing_thread = threading.Thread(
-                target=self.process_audio_thread,
-                args=(
-                    self.file_path.get(),
-                    self.max_duration.get(),
-                    self.language_code.get().strip(),
-                    self.use_vad.get(),
-                    self.beam_size.get()
-                ),
-                daemon=True
-            )
-            self.processing_thread.start()
+            self.start_next_job()
 
         except Exception as e:
             logger.error(f"Error starting processing: {e}")
+            self.queue_active = False
             self.is_processing = False
             self.progress_bar.stop()
             self.toggle_processing_controls(True)
             messagebox.showerror("处理错误", f"启动处理失败: {e}")
 
-    def process_audio_thread(self, file_path: str, max_duration: int, lang_code: str, use_vad: bool, beam_size: int) -> None:
-        """Process audio file in a separate thread."""
-        temp_wav_path = None
-
-        try:
-            logger.info(f"Starting audio processing: {file_path}")
-
-            # Step 1: Convert audio format
-            self.update_status_from_thread("步骤 1/4: 转换音频格式...")
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_wav:
-                temp_wav_path = tmp_wav.name
-                self.temp_files.append(temp_wav_path)  # Track for cleanup
-
-            try:
-                # Convert to WAV format with specific parameters for Whisper
-                stream = ffmpeg.input(file_path)
-                stream = ffmpeg.output(stream, temp_wav_path, ac=1, ar=16000, acodec='pcm_s16le')
-                ffmpeg.run(stream, cmd='ffmpeg', overwrite_output=True, capture_stdout=True, capture_stderr=True)
-
-                logger.info(f"Audio converted successfully: {temp_wav_path}")
-
-            except ffmpeg.Error as e:
-                error_msg = f"FFmpeg 转换错误: {e.stderr.decode() if e.stderr else str(e)}"
-                logger.error(error_msg)
-                self.result_queue.put(("error", error_msg))
-                return
-            except FileNotFoundError:
-                error_msg = "FFmpeg 未找到。请确保已安装 FFmpeg 并添加到系统 PATH"
-                logger.error(error_msg)
-                self.result_queue.put(("error", error_msg))
-                return
-
-            # Verify converted file
-            if not os.path.exists(temp_wav_path) or os.path.getsize(temp_wav_path) == 0:
-                error_msg = "音频转换失败，生成的文件为空"
-                logger.error(error_msg)
-                self.result_queue.put(("error", error_msg))
-                return
-
-            # Step 2: Load audio for preview
-            self.update_status_from_thread("步骤 2/4: 加载音频用于预览...")
-            try:
-                full_audio_segment = AudioSegment.from_file(temp_wav_path, format="wav")
-                duration_minutes = len(full_audio_segment) / 1000 / 60
-                logger.info(f"Audio loaded: {duration_minutes:.1f} minutes")
-
-                if duration_minutes > 60:  # Warn for very long files
-                    self.update_status_from_thread(f"音频时长 {duration_minutes:.1f} 分钟，处理可能需要较长时间...")
-
-            except Exception as e:
-                error_msg = f"音频加载失败: {e}"
-                logger.error(error_msg)
-                self.result_queue.put(("error", error_msg))
-                return
-
-            # Step 3: Transcribe with Whisper
-            self.update_status_from_thread("步骤 3/4: 使用 Whisper 进行语音识别...")
-            try:
-                # Validate language code if provided
-                if lang_code and len(lang_code) != 2:
-                    logger.warning(f"Invalid language code: {lang_code}, using auto-detection")
-                    lang_code = None
-
-                segments, info = self.model.transcribe(
-                    temp_wav_path,
-                    word_timestamps=True,
-                    language=lang_code if lang_code else None,
-                    vad_filter=use_vad,
-                    beam_size=beam_size,
-                    temperature=0.0,  # Use deterministic decoding
-                    compression_ratio_threshold=2.4,
-                    log_prob_threshold=-1.0,
-                    no_speech_threshold=0.6
-                )
-
-                detected_lang = info.language
-                logger.info(f"Transcription completed. Detected language: {detected_lang}")
-
-            except Exception as e:
-                error_msg = f"语音识别失败: {e}"
-                logger.error(f"Transcription failed: {e}")
-                logger.error(traceback.format_exc())
-                self.result_queue.put(("error", error_msg))
-                return
-
-            # Step 4: Smart segmentation
-            self.update_status_from_thread("步骤 4/4: 智能分段并整理结果...")
-            try:
-                final_segments = self.perform_smart_segmentation(segments, max_duration)
-
-                if not final_segments:
-                    error_msg = "未检测到任何语音内容，请检查音频文件"
-                    logger.warning(error_msg)
-                    self.result_queue.put(("error", error_msg))
-                    return
-
-                logger.info(f"Segmentation completed: {len(final_segments)} segments")
-
-                result_payload = {
-                    "detected_lang": detected_lang,
-                    "segments": final_segments,
-                    "audio": full_audio_segment
-                }
-                self.result_queue.put(("success", result_payload))
-
-            except Exception as e:
-                error_msg = f"分段处理失败: {e}"
-                logger.error(f"Segmentation failed: {e}")
-                logger.error(traceback.format_exc())
-                self.result_queue.put(("error", error_msg))
-                return
-
-        except Exception as e:
-            error_msg = f"处理过程中发生未知错误: {e}"
-            logger.error(f"Unexpected error in processing: {e}")
-            logger.error(traceback.format_exc())
-            self.result_queue.put(("error", error_msg))
-
-        finally:
-            # Clean up temporary file
-            if temp_wav_path and os.path.exists(temp_wav_path):
-                try:
-                    os.remove(temp_wav_path)
-                    if temp_wav_path in self.temp_files:
-                        self.temp_files.remove(temp_wav_path)
-                    logger.info(f"Temporary file cleaned up: {temp_wav_path}")
-                except Exception as e:
-                    logger.error(f"Failed to clean up temporary file: {e}")
-
-            # Reset processing flag
-            self.is_processing = False
-
-    def perform_smart_segmentation(self, whisper_segments, max_len_sec: int) -> List[Dict[str, Any]]:
-        """Perform intelligent segmentation of transcribed audio.
-
-        This function takes Whisper transcription segments and intelligently splits them
-        into segments of appropriate length, preferring to break at sentence boundaries.
+    def start_next_job(self) -> None:
+        """Run the first pending job on the loaded model, or wind the queue down if there is none."""
+        job = next((job for job in self.jobs if job["status"] == "pending"), None)
+        if job is None or not self.queue_active:
+            self.finish_queue()
+            return
 
-        Args:
-            whisper_segments: Iterator of Whisper transcription segments
-            max_len_sec: Maximum length of each segment in seconds
+        if not self.validate_file_path(job["file_path"]):
+            job["status"], job["error"] = "failed", "文件无效"
+            self.update_job_row(job)
+            self.failed_jobs.append(job)
+            self.root.after_idle(self.start_next_job)
+            return
 
-        Returns:
-            List of segment dictionaries with 'start', 'end', and 'text' keys
-        """
-        final_segments = []
-
-        # Extract all words from segments
-        all_words = []
-        for segment in whisper_segments:
-            if hasattr(segment, 'words') and segment.words:
-                all_words.extend(segment.words)
-
-        if not all_words:
-            logger.warning("No words found in transcription segments")
-            return []
-
-        logger.info(f"Processing {len(all_words)} words for segmentation")
-
-        current_segment_start = all_words[0].start
-        segment_word_start_index = 0
-
-        # Sentence-ending punctuation for different languages
-        sentence_endings = {
-            'en': '.?!',
-            'zh': '。？！',
-            'ja': '。？！',
-            'ko': '.?!。？！',
-            'es': '.?!¿¡',
-            'fr': '.?!',
-            'de': '.?!',
-            'ru': '.?!',
-            'ar': '.؟!',
-        }
+        job["status"] = "running"
+        job["segments"] = []
+        self.update_job_row(job)
+        self.running_job = job
+        self.is_processing = True
+        self.progress_bar.start()
+        if self.follow_running_job:
+            self.view_job(job)
+
+        self.update_status(f"正在处理: {os.path.basename(job['file_path'])}")
+        logger.info(f"Starting processing: {job['file_path']}")
+
+        self.worker.process({
+            "job": job["id"],
+            "file_path": job["file_path"],
+            "model_info": self.model_info,
+            "max_duration": self.max_duration.get(),
+            "lang_code": self.language_code.get().strip(),
+            "use_vad": self.use_vad.get(),
+            "beam_size": self.beam_size.get(),
+            "segmentation": self.segmentation_mode.get(),
+        })
+
+    def finish_job(self, job: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        """Record the outcome of the running job and move on to the next one."""
+        job["status"], job["error"] = status, error
+        self.update_job_row(job)
+        if status == "failed":
+            self.failed_jobs.append(job)
+        self.running_job = None
+        self.is_processing = False
+        self.reset_progress_bar()
+        if job is self.viewed_job:
+            if status == "done" and len(self.result_tree.get_children()) == len(job["segments"]):
+                # Everything was already streamed in
+                self.segments_data = job["segments"]
+                self.update_save_button()
+            else:
+                self.view_job(job)
+        self.start_next_job()
+
+    def finish_queue(self) -> None:
+        """Return to idle once no job is left to run or the queue was stopped."""
+        stopped = not self.queue_active
+        self.queue_active = False
+        self.toggle_processing_controls(True)
+        failed = self.failed_jobs
+        if stopped:
+            self.update_status("处理已取消。")
+        elif failed:
+            self.update_status(f"队列处理完成，{len(failed)} 个文件失败。")
+            messagebox.showerror("处理错误", "\n".join(
+                f"{os.path.basename(job['file_path'])}: {job['error']}" for job in failed[-10:]
+            ))
+        else:
+            self.update_status("处理完成！")
 
-        # Use comprehensive punctuation set
-        all_punctuation = ''.join(sentence_endings.values())
-
-        for i, word in enumerate(all_words):
-            segment_duration = word.end - current_segment_start
-            is_last_word = (i == len(all_words) - 1)
-
-            # Continue if under max duration and not the last word
-            if segment_duration < max_len_sec and not is_last_word:
-                continue
-
-            # Find the best split point (backtrack from current word)
-            best_split_index = i
-
-            if not is_last_word:  # Don't backtrack if forced to split at the end
-                # Look for sentence-ending punctuation within reasonable range
-                search_range = min(10, i - segment_word_start_index)  # Look back up to 10 words
-
-                for j in range(i, max(segment_word_start_index - 1, i - search_range), -1):
-                    word_text = all_words[j].word.strip()
-                    if any(p in word_text for p in all_punctuation):
-                        best_split_index = j
-                        break
-
-                # If no punctuation found, look for natural pauses (longer gaps)
-                if best_split_index == i and i > segment_word_start_index:
-                    for j in range(i, max(segment_word_start_index - 1, i - search_range), -1):
-                        if j > 0:
-                            gap = all_words[j].start - all_words[j-1].end
-                            if gap > 0.5:  # 500ms pause
-                                best_split_index = j - 1
-                                break
-
-            # Create segment
-            segment_end_word = all_words[best_split_index]
-            segment_words = all_words[segment_word_start_index : best_split_index + 1]
-            segment_text = "".join(w.word for w in segment_words).strip()
-
-            # Only add non-empty segments
-            if segment_text:
-                final_segments.append({
-                    "start": current_segment_start,
-                    "end": segment_end_word.end,
-                    "text": segment_text
-                })
-
-            # Start new segment
-            if best_split_index + 1 < len(all_words):
-                next_word = all_words[best_split_index + 1]
-                current_segment_start = next_word.start
-                segment_word_start_index = best_split_index + 1
-            else:  # Processed all words
-                break
-
-        logger.info(f"Created {len(final_segments)} segments from smart segmentation")
-        return final_segments
+    def cancel_processing(self) -> None:
+        """Ask the running job to stop; ffmpeg is killed and inference stops at the next segment."""
+        if not self.is_processing or self.running_job is None:
+            return
+        # Pending jobs stay queued for the next start
+        self.queue_active = False
+        job = self.running_job
+        self.worker.cancel(job["id"])
+        self.cancel_button.config(state="disabled")
+        self.update_status("正在取消处理...")
+        logger.info("Cancellation requested")
+        self.root.after(int(CANCEL_GRACE_SECONDS * 1000), lambda: self.force_cancel(job))
+
+    def force_cancel(self, job: Dict[str, Any]) -> None:
+        """Hard cancel: restart the worker if the job ignored the cancellation."""
+        if self.running_job is not job:
+            return
+        logger.warning("Job did not stop in time, restarting the transcription worker")
+        self.restart_worker()
+        self.finish_job(job, "cancelled")
+
+    def restart_worker(self) -> None:
+        """Replace a stuck or crashed worker process and reload the current model in it."""
+        self.worker.restart(reload_model=self.model_info is not None, timeout=0)
+        if self.model_info is not None:
+            self.is_loading_model = True
+            self.update_status("正在重启工作进程并重新加载模型...")
+
+    def handle_worker_exit(self) -> None:
+        """The worker died (crash or out of memory): fail its job and start a new worker."""
+        logger.error("Transcription worker exited unexpectedly")
+        self.restart_worker()
+        if self.running_job is not None:
+            self.finish_job(self.running_job, "failed", "工作进程意外退出（可能内存不足），已自动重启")
 
     def check_queue(self) -> None:
-        """Check for messages from worker threads."""
+        """Check for messages from the worker process."""
+        # Only the newest progress report of a batch of messages is drawn
+        latest_progress = None
         try:
             # Process all available messages
             while True:
                 try:
-                    message_type, data = self.result_queue.get_nowait()
+                    message_type, data = self.worker.poll()
 
                     if message_type == "model_loaded":
+                        self.is_loading_model = False
+                        self.model_info = {key: data[key] for key in ("size", "device", "compute_type")}
+                        self.resident_models = data["resident"]
+                        self.metrics_recorder.record_model_load(data["load_seconds"])
+                        logger.info("Model loaded successfully")
+                        if self.is_processing:
+                            # Reloaded after a worker restart while the queue keeps running
+                            continue
                         self.progress_bar.stop()
-                        self.model = data
-                        self.update_status(f"模型 '{self.model_size.get()}' 加载成功！请选择文件并开始处理。")
+                        self.save_current_settings()
+                        self.update_status(f"模型 '{data['size']}' 加载成功！请添加文件并开始处理。")
                         self.start_button.config(state="normal")
                         self.reset_button.config(state="normal")
-                        logger.info("Model loaded successfully")
 
-                    elif message_type == "success":
+                    elif message_type == "metrics":
+                        self.metrics_recorder.record(data)
+
+                    elif message_type == "transcribing":
+                        job = self.find_job(data["job"])
+                        if job is None or job is not self.running_job:
+                            # Removed from the queue or given up on in the meantime
+                            if data["audio"] is not None:
+                                data["audio"].close()
+                            continue
+                        job["detected_lang"], job["audio"] = data["detected_lang"], data["audio"]
+                        if job is self.viewed_job:
+                            self.view_job(job)
+                        # From here on progress is measured against the audio duration
                         self.progress_bar.stop()
-                        self.is_processing = False
-                        self.toggle_processing_controls(True)
-                        self.update_status("处理完成！")
-                        self.display_results(data)
+                        self.progress_bar.config(mode="determinate", maximum=100, value=0)
+
+                    elif message_type == "progress":
+                        latest_progress = data
+
+                    elif message_type == "segment":
+                        job_id, seg = data
+                        job = self.find_job(job_id)
+                        if job is not None:
+                            job["segments"].append(seg)
+                            if job is self.viewed_job:
+                                self.append_result_row(len(job["segments"]) - 1, seg)
+
+                    elif message_type == "success":
+                        latest_progress = None
+                        job = self.find_job(data["job"])
+                        if job is not None and job is self.running_job:
+                            job["segments"] = data["segments"]
+                            self.finish_job(job, "done")
                         logger.info("Processing completed successfully")
 
+                    elif message_type == "job_error":
+                        latest_progress = None
+                        job = self.find_job(data["job"])
+                        logger.error(f"Processing error: {data['error']}")
+                        if job is not None and job is self.running_job:
+                            self.finish_job(job, "failed", data["error"])
+                            if self.is_processing:
+                                self.update_status(f"{os.path.basename(job['file_path'])} 处理失败，继续下一个文件...")
+
+                    elif message_type == "cancelled":
+                        latest_progress = None
+                        job = self.find_job(data)
+                        # Segments shown so far stay viewable, but a partial result is not exported
+                        if job is not None and job is self.running_job:
+                            self.finish_job(job, "cancelled")
+                        logger.info("Processing cancelled")
+
                     elif message_type == "error":
-                        self.progress_bar.stop()
+                        latest_progress = None
+                        self.reset_progress_bar()
                         self.is_processing = False
+                        self.is_loading_model = False
                         self.update_status("处理失败。")
 
                         # Show error with more context
@@ -839,6 +993,13 @@ class AutoSegmenterApp:
                 except queue.Empty:
                     break
 
+            if latest_progress is not None and self.is_processing:
+                self.progress_bar.config(value=latest_progress["fraction"] * 100)
+                self.update_status(format_progress(latest_progress))
+
+            if (self.is_processing or self.is_loading_model) and not self.worker.is_alive():
+                self.handle_worker_exit()
+
         except Exception as e:
             logger.error(f"Error in check_queue: {e}")
 
@@ -847,30 +1008,57 @@ class AutoSegmenterApp:
             if hasattr(self, 'root') and self.root.winfo_exists():
                 self.root.after(100, self.check_queue)
     
-    def display_results(self, data):
-        # This function is largely unchanged.
-        self.result_text.config(state="normal")
-        self.result_text.delete("1.0", tk.END)
-
-        detected_lang = data["detected_lang"]
-        self.full_audio = data["audio"]
-        self.segments_data = data["segments"]
-
-        self.result_text.insert(tk.END, f"检测到的语言: {detected_lang.upper()}\n")
-        self.result_text.insert(tk.END, "=" * 40 + "\n\n")
-
-        for i, seg in enumerate(self.segments_data):
-            start_time, end_time, text = seg["start"], seg["end"], seg["text"]
-            header = f"Segment {i+1}: {time.strftime('%H:%M:%S', time.gmtime(start_time))}.{int((start_time % 1) * 1000):03d} - {time.strftime('%H:%M:%S', time.gmtime(end_time))}.{int((end_time % 1) * 1000):03d}\n"
-            self.result_text.insert(tk.END, header, f"h{i}")
-            play_button = ttk.Button(self.result_text, text="▶️ 播放", command=lambda s=start_time, e=end_time: self.play_segment(s, e))
-            self.result_text.window_create(tk.END, window=play_button, padx=5)
-            self.result_text.insert(tk.END, f" {text}\n", f"t{i}")
-            self.result_text.insert(tk.END, "-" * 40 + "\n\n")
-            self.result_text.tag_config(f"h{i}", font=("Segoe UI", 10, "bold"))
-
-        self.result_text.config(state="disabled")
-        self.save_button.config(state="normal")
+    def display_results(self, job: Dict[str, Any]) -> None:
+        """Show a job's segments and preview audio in the results area."""
+        self.clear_results_view()
+        self.pcm_store = job["audio"]
+        self.segments_data = job["segments"]
+        if job["detected_lang"]:
+            self.detected_lang_label.config(text=f"检测到的语言: {job['detected_lang'].upper()}")
+        for i, seg in enumerate(job["segments"]):
+            self.append_result_row(i, seg)
+
+    def clear_results_view(self) -> None:
+        """Empty the results list and the selected-segment text."""
+        self.result_tree.delete(*self.result_tree.get_children())
+        self.detected_lang_label.config(text="")
+        self.play_button.config(state="disabled")
+        self.segment_text.config(state="normal")
+        self.segment_text.delete("1.0", tk.END)
+        self.segment_text.config(state="disabled")
+
+    def append_result_row(self, i: int, seg: Dict[str, Any]) -> None:
+        """Append one segment to the results list as soon as it is available."""
+        # The row id is the index into segments_data
+        self.result_tree.insert("", tk.END, iid=str(i), values=format_result_row(i + 1, seg))
+
+    def selected_segment(self) -> Optional[Dict[str, Any]]:
+        """The segment of the selected row, if any."""
+        selection = self.result_tree.selection()
+        if not selection:
+            return None
+        return self.segments_data[int(selection[0])]
+
+    def show_selected_segment(self, event=None) -> None:
+        """Show the full text of the selected segment below the list."""
+        seg = self.selected_segment()
+        self.play_button.config(state="normal" if seg else "disabled")
+        self.segment_text.config(state="normal")
+        self.segment_text.delete("1.0", tk.END)
+        if seg:
+            self.segment_text.insert(tk.END, seg["text"])
+        self.segment_text.config(state="disabled")
+
+    def play_selected_segment(self, event=None) -> None:
+        """Play the selected segment (button, double-click or Enter)."""
+        seg = self.selected_segment()
+        if seg:
+            self.play_segment(seg["start"], seg["end"])
+
+    def update_save_button(self) -> None:
+        """Exporting is possible once the viewed job has finished successfully."""
+        done = self.viewed_job is not None and self.viewed_job["status"] == "done"
+        self.save_button.config(state="normal" if done else "disabled")
 
     def play_segment(self, start_sec: float, end_sec: float) -> None:
         """Play a specific audio segment.
@@ -879,20 +1067,27 @@ class AutoSegmenterApp:
             start_sec: Start time in seconds
             end_sec: End time in seconds
         """
-        if not self.full_audio:
+        if self.pcm_store is None:
             logger.warning("No audio loaded for playback")
             return
 
         try:
-            start_ms = int(start_sec * 1000)
-            end_ms = int(end_sec * 1000)
-
             # Validate time bounds
-            if start_ms < 0 or end_ms > len(self.full_audio) or start_ms >= end_ms:
-                logger.warning(f"Invalid playback range: {start_ms}-{end_ms}ms")
+            if start_sec < 0 or end_sec > self.pcm_store.duration or start_sec >= end_sec:
+                logger.warning(f"Invalid playback range: {start_sec:.3f}-{end_sec:.3f}s")
                 return
 
-            audio_segment = self.full_audio[start_ms:end_ms]
+            # Imported on first playback to keep startup fast
+            from pydub import AudioSegment
+            from pydub.playback import play
+
+            # Only the pages of this slice are read from the mapped file
+            audio_segment = AudioSegment(
+                data=self.pcm_store.samples(start_sec, end_sec).tobytes(),
+                sample_width=2,
+                frame_rate=SAMPLE_RATE,
+                channels=1
+            )
 
             # Play in separate thread to avoid blocking UI
             def play_audio():
@@ -917,7 +1112,7 @@ class AutoSegmenterApp:
 
         try:
             # Generate default filename
-            source_name = os.path.splitext(os.path.basename(self.file_path.get()))[0]
+            source_name = os.path.splitext(os.path.basename(self.viewed_job["file_path"]))[0]
             default_filename = f"{source_name}_transcription.txt"
 
             file_path = filedialog.asksaveasfilename(
@@ -958,37 +1153,12 @@ class AutoSegmenterApp:
 
     def _save_as_txt(self, file_handle) -> None:
         """Save results in plain text format."""
-        # Write header information
-        file_handle.write(f"音频转录结果\n")
-        file_handle.write(f"=" * 50 + "\n")
-        file_handle.write(f"源文件: {self.file_path.get()}\n")
-        file_handle.write(f"模型: {self.model_size.get()}\n")
-        file_handle.write(f"设备: {self.device.get()}\n")
-        file_handle.write(f"计算精度: {self.compute_type.get()}\n")
-        file_handle.write(f"生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-        file_handle.write(f"总段数: {len(self.segments_data)}\n\n")
-
-        # Write segments
-        for i, seg in enumerate(self.segments_data):
-            start_time, end_time, text = seg["start"], seg["end"], seg["text"]
-            start_str = f"{time.strftime('%H:%M:%S', time.gmtime(start_time))}.{int((start_time % 1) * 1000):03d}"
-            end_str = f"{time.strftime('%H:%M:%S', time.gmtime(end_time))}.{int((end_time % 1) * 1000):03d}"
-
-            file_handle.write(f"段落 {i+1}: {start_str} --> {end_str}\n")
-            file_handle.write(f"{text.strip()}\n\n")
+        write_txt(file_handle, self.segments_data, self.viewed_job["file_path"],
+                  self.model_size.get(), self.device.get(), self.compute_type.get())
 
     def _save_as_srt(self, file_handle) -> None:
         """Save results in SRT subtitle format."""
-        for i, seg in enumerate(self.segments_data):
-            start_time, end_time, text = seg["start"], seg["end"], seg["text"]
-
-            # Convert to SRT time format (HH:MM:SS,mmm)
-            start_str = f"{time.strftime('%H:%M:%S', time.gmtime(start_time))},{int((start_time % 1) * 1000):03d}"
-            end_str = f"{time.strftime('%H:%M:%S', time.gmtime(end_time))},{int((end_time % 1) * 1000):03d}"
-
-            file_handle.write(f"{i+1}\n")
-            file_handle.write(f"{start_str} --> {end_str}\n")
-            file_handle.write(f"{text.strip()}\n\n")
+        write_srt(file_handle, self.segments_data)
 
     def toggle_model_config_widgets(self, enabled: bool) -> None:
         """Enable or disable model configuration widgets.
@@ -1012,15 +1182,24 @@ class AutoSegmenterApp:
         state = "normal" if enabled else "disabled"
         try:
             self.start_button.config(state=state)
-            self.save_button.config(state="disabled")  # Always disable save button until results are ready
+            self.cancel_button.config(state="disabled" if enabled else "normal")
+            # Finished jobs stay exportable while later ones run
+            self.update_save_button()
             self.reset_button.config(state=state)
+            self.release_button.config(state=state)
 
             # Also disable transcription settings during processing
             self.vad_check.config(state=state)
             self.beam_spinbox.config(state=state)
+            self.segmentation_combo.config(state="readonly" if enabled else "disabled")
         except Exception as e:
             logger.error(f"Error toggling processing controls: {e}")
 
+    def reset_progress_bar(self) -> None:
+        """Stop the progress bar and return it to the busy-indicator mode."""
+        self.progress_bar.stop()
+        self.progress_bar.config(mode="indeterminate", value=0)
+
     def update_status(self, message: str) -> None:
         """Update the status label with a new message.
 
@@ -1033,27 +1212,15 @@ class AutoSegmenterApp:
         except Exception as e:
             logger.error(f"Error updating status: {e}")
 
-    def update_status_from_thread(self, message: str) -> None:
-        """Update status from a worker thread by queuing the message.
-
-        Args:
-            message: Status message to display
-        """
-        try:
-            self.result_queue.put(("status", message))
-        except Exception as e:
-            logger.error(f"Error queuing status update: {e}")
-
 def setup_theme(root: tk.Tk) -> None:
     """Setup application theme and styling."""
-    try:
-        # Try to use ttkthemes for better appearance
-        from ttkthemes import ThemedTk
+    # Look for ttkthemes without importing it (and Pillow with it)
+    if importlib.util.find_spec("ttkthemes") is not None:
         # Note: We can't change root type after creation, so this is just for styling
         style = ttk.Style()
         style.theme_use("clam")  # Use clam as base
 
-    except ImportError:
+    else:
         logger.info("ttkthemes not available, using default themes")
         style = ttk.Style()
         available_themes = style.theme_names()
@@ -1087,6 +1254,10 @@ def setup_theme(root: tk.Tk) -> None:
 
 def main() -> None:
     """Main application entry point."""
+    # Checked here rather than at import, so that importing this module stays cheap
+    if not check_dependencies():
+        sys.exit(1)
+
     try:
         # Create main window
         root = tk.Tk()
@@ -0,0 +1,340 @@
+"""Audio decoding helpers.
+
+Media is decoded once by ffmpeg into 16 kHz mono PCM. ``decode_audio`` pipes
+it straight into a NumPy array for Whisper; ``PCMStore`` streams it into a
+memory-mapped file so long recordings can be previewed without holding the
+whole waveform in the heap.
+
+WAV files that already hold 16 kHz mono 16-bit PCM skip ffmpeg entirely:
+``probe_pcm_wav`` finds their sample data from the RIFF header and it is
+read or memory-mapped in place.
+"""
+import logging
+import os
+import struct
+import tempfile
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+from autoseg_errors import PipelineError, CancellationToken
+
+logger = logging.getLogger("autoseg.audio")
+
+# Whisper models expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+# Bytes read from ffmpeg's stdout per chunk when streaming to disk
+PIPE_CHUNK_SIZE = 1024 * 1024
+
+# Format tags in a WAV ``fmt `` chunk
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def probe_pcm_wav(file_path: str) -> Optional[Tuple[int, int]]:
+    """Check whether a file is a WAV already in the format Whisper needs.
+
+    Only the RIFF header is parsed, so this costs a few small reads
+    regardless of the file's length.
+
+    Returns:
+        ``(offset, num_samples)`` of the sample data if the file is a
+        16 kHz mono 16-bit PCM WAV, otherwise None
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                return None
+            file_size = os.fstat(f.fileno()).st_size
+            format_ok = False
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    return None
+                chunk_id, size = chunk_header[:4], struct.unpack('<I', chunk_header[4:])[0]
+                if chunk_id == b'fmt ':
+                    fmt = f.read(size)
+                    if len(fmt) < 16:
+                        return None
+                    tag, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+                    if tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                        # The sub-format GUID starts with the actual format tag
+                        tag = struct.unpack('<H', fmt[24:26])[0]
+                    format_ok = (tag, channels, rate, block_align, bits) == (WAVE_FORMAT_PCM, 1, SAMPLE_RATE, 2, 16)
+                    if not format_ok:
+                        return None
+                elif chunk_id == b'data':
+                    if not format_ok:
+                        return None
+                    offset = f.tell()
+                    # Recorders that stream or were interrupted leave the size at 0 or too large
+                    available = file_size - offset
+                    if size == 0 or size > available:
+                        size = available
+                    num_samples = size // 2
+                    return (offset, num_samples) if num_samples > 0 else None
+                else:
+                    f.seek(size, os.SEEK_CUR)
+                # Chunks are padded to an even length
+                if size % 2:
+                    f.seek(1, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+
+
+def _pcm_output(file_path: str):
+    """Build the ffmpeg graph that writes 16 kHz mono s16le PCM to stdout.
+
+    Video, subtitle and data streams are dropped up front, so a video
+    container is only demuxed for its audio and nothing else is decoded.
+    """
+    import ffmpeg
+
+    stream = ffmpeg.input(file_path)
+    return ffmpeg.output(stream, 'pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE,
+                         vn=None, sn=None, dn=None)
+
+
+def _start_ffmpeg(file_path: str, cancel_token: Optional[CancellationToken]):
+    """Start the ffmpeg decode; cancelling the token kills the process.
+
+    Returns:
+        The process and a function that unregisters the kill callback
+    """
+    import ffmpeg
+
+    try:
+        process = ffmpeg.run_async(_pcm_output(file_path), cmd='ffmpeg', pipe_stdout=True, pipe_stderr=True)
+    except FileNotFoundError as e:
+        raise PipelineError("FFmpeg 未找到。请确保已安装 FFmpeg 并添加到系统 PATH") from e
+    if cancel_token is None:
+        return process, lambda: None
+    return process, cancel_token.on_cancel(process.kill)
+
+
+def decode_audio(file_path: str, cancel_token: Optional[CancellationToken] = None):
+    """Decode any supported media file to a float32 waveform in [-1, 1).
+
+    Args:
+        file_path: Audio or video file to decode
+        cancel_token: Kills ffmpeg when cancelled
+
+    Returns:
+        1-D float32 NumPy array sampled at ``SAMPLE_RATE``
+
+    Raises:
+        PipelineError: If ffmpeg is missing or the decode fails
+        JobCancelled: If the token was cancelled
+    """
+    import numpy as np
+
+    # Already 16 kHz mono PCM: convert straight from a mapping of the file
+    store = PCMStore.from_wav(file_path)
+    if store is not None:
+        audio = store.to_float32()
+        store.close()
+        return audio
+
+    process, unregister = _start_ffmpeg(file_path, cancel_token)
+    try:
+        pcm_bytes, stderr = process.communicate()
+    finally:
+        unregister()
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if process.returncode != 0:
+        raise PipelineError(f"FFmpeg 转换错误: {stderr.decode(errors='replace') or process.returncode}")
+
+    if not pcm_bytes:
+        raise PipelineError("音频转换失败，生成的文件为空")
+
+    audio = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32)
+    del pcm_bytes
+    audio *= 1.0 / 32768.0
+
+    logger.info(f"Audio decoded: {len(audio) / SAMPLE_RATE / 60:.1f} minutes")
+    return audio
+
+
+def _stream_pcm_to_file(file_path: str, out_file, cancel_token: Optional[CancellationToken] = None) -> None:
+    """Run ffmpeg and copy its PCM output to ``out_file`` chunk by chunk."""
+    process, unregister = _start_ffmpeg(file_path, cancel_token)
+
+    # Drain stderr on the side so a chatty ffmpeg cannot fill the pipe and block
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    stderr_thread.start()
+
+    try:
+        while True:
+            chunk = process.stdout.read(PIPE_CHUNK_SIZE)
+            if not chunk:
+                break
+            out_file.write(chunk)
+    finally:
+        # A killed ffmpeg closes its stdout, which ends the loop above
+        unregister()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        stderr_thread.join()
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    if process.returncode != 0:
+        stderr = b"".join(stderr_chunks).decode(errors="replace")
+        raise PipelineError(f"FFmpeg 转换错误: {stderr or process.returncode}")
+
+
+def decode_to_file(file_path: str, out_path: str, cancel_token: Optional[CancellationToken] = None) -> None:
+    """Decode a media file to raw 16 kHz mono PCM at ``out_path``.
+
+    The data is written to a temporary file next to ``out_path`` and renamed
+    into place, so readers never see a partial file.
+
+    Raises:
+        PipelineError: If ffmpeg is missing or the decode fails
+        JobCancelled: If the token was cancelled; the partial file is removed
+    """
+    directory = os.path.dirname(out_path) or None
+    with tempfile.NamedTemporaryFile(suffix=".part", dir=directory, delete=False) as tmp_pcm:
+        try:
+            _stream_pcm_to_file(file_path, tmp_pcm, cancel_token)
+        except BaseException:
+            tmp_pcm.close()
+            os.remove(tmp_pcm.name)
+            raise
+
+    if os.path.getsize(tmp_pcm.name) == 0:
+        os.remove(tmp_pcm.name)
+        raise PipelineError("音频转换失败，生成的文件为空")
+    os.replace(tmp_pcm.name, out_path)
+
+
+class PCMStore:
+    """16 kHz mono 16-bit PCM kept in a memory-mapped file.
+
+    Only the pages that are actually read stay resident, so the preview audio
+    of a multi-hour recording costs next to no heap. Slices returned by
+    ``samples`` are views onto the mapping rather than copies.
+    """
+
+    def __init__(self, path: str, offset: int = 0, num_samples: Optional[int] = None,
+                 owns_file: bool = False):
+        """Map an existing raw PCM file.
+
+        Args:
+            path: File containing little-endian 16-bit mono samples
+            offset: Byte offset of the first sample
+            num_samples: Number of samples, defaults to the rest of the file
+            owns_file: Delete the file when the store is closed
+        """
+        import numpy as np
+
+        if num_samples is None:
+            num_samples = (os.path.getsize(path) - offset) // 2
+        if num_samples <= 0:
+            raise PipelineError("音频转换失败，生成的文件为空")
+
+        self.path = path
+        self.offset = offset
+        self.owns_file = owns_file
+        self.from_cache = False  # Set by AudioCache when no decode was needed
+        self.direct = False  # Mapped straight from a source WAV, neither decoded nor cached
+        self._samples = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(num_samples,))
+
+    @classmethod
+    def from_wav(cls, file_path: str) -> Optional["PCMStore"]:
+        """Map a 16 kHz mono 16-bit PCM WAV in place, None for any other file.
+
+        The store does not own the file, so closing it leaves the source alone.
+        """
+        wav = probe_pcm_wav(file_path)
+        if wav is None:
+            return None
+        offset, num_samples = wav
+        store = cls(file_path, offset=offset, num_samples=num_samples)
+        store.direct = True
+        logger.info(f"Audio mapped directly from 16 kHz mono PCM WAV: {store.duration / 60:.1f} minutes")
+        return store
+
+    @classmethod
+    def decode(cls, file_path: str, directory: Optional[str] = None,
+               cancel_token: Optional[CancellationToken] = None) -> "PCMStore":
+        """Decode a media file into a new temporary store.
+
+        ffmpeg's output is streamed to disk in chunks, so the decode itself
+        never holds the full waveform in memory either. A WAV that is
+        already 16 kHz mono 16-bit PCM is mapped in place instead (see
+        ``from_wav``).
+
+        Raises:
+            PipelineError: If ffmpeg is missing or the decode fails
+            JobCancelled: If the token was cancelled; the temporary file is removed
+        """
+        store = cls.from_wav(file_path)
+        if store is not None:
+            return store
+
+        with tempfile.NamedTemporaryFile(suffix=".pcm", dir=directory, delete=False) as tmp_pcm:
+            try:
+                _stream_pcm_to_file(file_path, tmp_pcm, cancel_token)
+            except BaseException:
+                tmp_pcm.close()
+                os.remove(tmp_pcm.name)
+                raise
+
+        try:
+            store = cls(tmp_pcm.name, owns_file=True)
+        except BaseException:
+            os.remove(tmp_pcm.name)
+            raise
+        logger.info(f"Audio decoded to {tmp_pcm.name}: {store.duration / 60:.1f} minutes")
+        return store
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def duration(self) -> float:
+        """Length of the audio in seconds."""
+        return len(self._samples) / SAMPLE_RATE
+
+    def samples(self, start_sec: float = 0.0, end_sec: Optional[float] = None):
+        """Return a zero-copy int16 view of the samples between two times."""
+        start = max(0, int(start_sec * SAMPLE_RATE))
+        end = len(self._samples) if end_sec is None else min(len(self._samples), int(end_sec * SAMPLE_RATE))
+        return self._samples[start:end]
+
+    def to_float32(self):
+        """Return the whole waveform as a float32 array for ``transcribe()``."""
+        import numpy as np
+
+        audio = np.asarray(self._samples, dtype=np.float32)
+        audio *= 1.0 / 32768.0
+        return audio
+
+    def hand_over(self) -> Dict[str, Any]:
+        """Close the mapping but keep the file, for another process to map.
+
+        Returns:
+            Keyword arguments for ``PCMStore`` that recreate this store,
+            including ownership of the backing file
+        """
+        handle = {"path": self.path, "offset": self.offset, "num_samples": len(self._samples),
+                  "owns_file": self.owns_file}
+        self.owns_file = False
+        self.close()
+        return handle
+
+    def close(self) -> None:
+        """Release the mapping and delete the backing file if the store owns it."""
+        if self._samples is None:
+            return
+        self._samples = None
+        if self.owns_file:
+            try:
+                os.remove(self.path)
+                logger.info(f"Cleaned up temporary file: {self.path}")
+            except OSError as e:
+                logger.error(f"Failed to clean up temporary file: {e}")
@@ -0,0 +1,347 @@
+"""Batch runners used by the headless CLI.
+
+Every runner yields ``(file_path, result, error)`` tuples in input order, so
+callers can report progress and aggregate throughput the same way whichever
+strategy is used. A failed file's ``result`` holds only its ``metrics``
+summary, with the timings gathered up to the failure, or is None when the
+file never got that far.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+from autoseg_engine import (
+    PipelineError, CancellationToken, StreamingSRTWriter, setup_logging, load_whisper_model,
+    describe_model_error, prefetch_input, discard_input, process_file, write_outputs, output_path_for
+)
+from autoseg_metrics import JobMetrics
+
+logger = logging.getLogger("autoseg.batch")
+
+BatchItem = Tuple[str, Optional[Dict[str, Any]], Optional[str]]
+
+# How often blocked pipeline stages check whether the pipeline was stopped
+PIPELINE_POLL_SECONDS = 0.1
+
+
+def _capture_error(file_path: str, error: Exception, metrics: Optional[JobMetrics] = None) -> BatchItem:
+    if isinstance(error, PipelineError):
+        message = str(error)
+    else:
+        logger.error(f"Unexpected error processing {file_path}: {error}", exc_info=error)
+        message = f"处理过程中发生未知错误: {error}"
+    if metrics is None:
+        return file_path, None, message
+    metrics.error = message
+    return file_path, {"metrics": metrics.to_dict()}, message
+
+
+def transcribe_for_export(model, file_path: str, job_options: Dict[str, Any], export_options: Dict[str, Any],
+                          prepared: Optional[Dict[str, Any]] = None
+                          ) -> Tuple[BatchItem, Optional[StreamingSRTWriter]]:
+    """Transcription half of ``process_and_export``.
+
+    Returns:
+        The item with the result (``outputs`` not yet set) and the SRT writer
+        that still has to be committed by ``export_result``
+    """
+    formats = list(export_options["formats"])
+    srt_writer = None
+    # Kept outside process_file so a failure still reports the steps that ran
+    metrics = prepared["metrics"] if prepared is not None else JobMetrics(file_path)
+    try:
+        start = time.perf_counter()
+        # SRT cues are written while Whisper is still decoding
+        if "srt" in formats:
+            srt_writer = StreamingSRTWriter(output_path_for(file_path, "srt", export_options.get("output_dir")))
+        result = process_file(model, file_path, segment_callback=srt_writer, prepared=prepared,
+                              **dict(job_options, metrics=metrics))
+        result["elapsed"] = time.perf_counter() - start
+        if prepared is not None:
+            # Decoded ahead of time, but still part of this file's processing
+            result["elapsed"] += result["metrics"]["steps"]["decode"]
+        return (file_path, result, None), srt_writer
+    except Exception as e:
+        if srt_writer:
+            srt_writer.discard()
+        return _capture_error(file_path, e, metrics), None
+
+
+def export_result(item: BatchItem, srt_writer: Optional[StreamingSRTWriter],
+                  export_options: Dict[str, Any]) -> BatchItem:
+    """Export half of ``process_and_export``: commit the SRT and write the other formats."""
+    file_path, result, error = item
+    if error:
+        return item
+    try:
+        start = time.perf_counter()
+        outputs = [srt_writer.commit()] if srt_writer else []
+        srt_writer = None
+        remaining = [fmt for fmt in export_options["formats"] if fmt != "srt"]
+        outputs += write_outputs(result, **dict(export_options, formats=remaining))
+        result["outputs"] = [str(p) for p in outputs]
+        result["elapsed"] += time.perf_counter() - start
+        return file_path, result, None
+    except Exception as e:
+        _, _, message = _capture_error(file_path, e)
+        result["metrics"].update(status="error", error=message)
+        return file_path, {"metrics": result["metrics"]}, message
+    finally:
+        if srt_writer:
+            srt_writer.discard()
+
+
+def process_and_export(model, file_path: str, job_options: Dict[str, Any],
+                       export_options: Dict[str, Any]) -> BatchItem:
+    """Process one file and write its outputs, capturing failures as an error string.
+
+    Args:
+        model: Loaded ``WhisperModel``
+        file_path: File to process
+        job_options: Keyword arguments for ``process_file``
+        export_options: Keyword arguments for ``write_outputs``
+
+    Returns:
+        ``(file_path, result, error)``; ``result`` gains an ``outputs`` key
+    """
+    item, srt_writer = transcribe_for_export(model, file_path, job_options, export_options)
+    return export_result(item, srt_writer, export_options)
+
+
+def iter_serial_batch(files: List[str], model, job_options: Dict[str, Any],
+                      export_options: Dict[str, Any]) -> Iterator[BatchItem]:
+    """Process files one after another on an already loaded model."""
+    for file_path in files:
+        yield process_and_export(model, file_path, job_options, export_options)
+
+
+def _put(stage_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Block until ``item`` fits into the bounded queue; False if the pipeline was stopped meanwhile."""
+    while not stop.is_set():
+        try:
+            stage_queue.put(item, timeout=PIPELINE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(stage_queue: queue.Queue, stop: threading.Event) -> Any:
+    """Block until an item arrives; None if the pipeline was stopped meanwhile."""
+    while not stop.is_set():
+        try:
+            return stage_queue.get(timeout=PIPELINE_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
+
+
+def iter_pipelined_batch(files: List[str], model, job_options: Dict[str, Any],
+                         export_options: Dict[str, Any], prefetch: int = 1) -> Iterator[BatchItem]:
+    """Process files one at a time on the model, with decoding and export overlapped.
+
+    Three stages run concurrently, connected by queues of ``prefetch`` items:
+
+    1. decode: cache lookup and ffmpeg conversion of the next files
+       (``prefetch_input``) on a background thread
+    2. transcribe: Whisper inference with streaming segmentation, on a
+       second thread, so the model never waits for ffmpeg
+    3. export: writing the outputs, in the caller's thread as it iterates
+
+    A full queue blocks the stage feeding it, so at most ``prefetch`` decoded
+    files wait for the model, and they wait as memory-mapped PCM rather than
+    float32. Results come back in input order. Closing the generator early
+    stops both threads and kills a running ffmpeg.
+
+    Args:
+        files: Files to process
+        model: Loaded ``WhisperModel``
+        job_options: Keyword arguments for ``process_file``
+        export_options: Keyword arguments for ``write_outputs``
+        prefetch: Files decoded ahead of the one being transcribed
+    """
+    stop = threading.Event()
+    # Stops ffmpeg and Whisper once the pipeline is stopped
+    token = CancellationToken()
+    if job_options.get("cancel_token") is not None:
+        unregister = job_options["cancel_token"].on_cancel(token.cancel)
+    else:
+        unregister = None
+    job_options = dict(job_options, cancel_token=token)
+    decoded: queue.Queue = queue.Queue(maxsize=prefetch)
+    transcribed: queue.Queue = queue.Queue(maxsize=prefetch)
+
+    def decode_stage() -> None:
+        for file_path in files:
+            metrics = JobMetrics(file_path)
+            try:
+                item = (file_path, prefetch_input(file_path, **dict(job_options, metrics=metrics)), None)
+            except Exception as e:
+                if stop.is_set():
+                    return
+                item = (file_path, None, _capture_error(file_path, e, metrics))
+            if not _put(decoded, item, stop):
+                if item[1] is not None:
+                    discard_input(item[1])
+                return
+        _put(decoded, None, stop)
+
+    def transcribe_stage() -> None:
+        while True:
+            item = _get(decoded, stop)
+            if item is None:
+                _put(transcribed, None, stop)
+                return
+            file_path, prepared, failed = item
+            if failed:
+                result = (failed, None)
+            else:
+                result = transcribe_for_export(model, file_path, job_options, export_options, prepared)
+            if not _put(transcribed, result, stop):
+                if result[1]:
+                    result[1].discard()
+                return
+
+    threads = [threading.Thread(target=decode_stage, name="autoseg-decode", daemon=True),
+               threading.Thread(target=transcribe_stage, name="autoseg-transcribe", daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = _get(transcribed, stop)
+            if item is None:
+                return
+            yield export_result(item[0], item[1], export_options)
+    finally:
+        stop.set()
+        token.cancel()
+        if unregister:
+            unregister()
+        for thread in threads:
+            thread.join()
+        # Files decoded or transcribed ahead but never exported
+        for stage_queue, release in ((decoded, discard_input), (transcribed, StreamingSRTWriter.discard)):
+            while True:
+                try:
+                    item = stage_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item and item[1] is not None:
+                    release(item[1])
+
+
+def iter_threaded_batch(files: List[str], model, job_options: Dict[str, Any],
+                        export_options: Dict[str, Any], streams: int) -> Iterator[BatchItem]:
+    """Process up to ``streams`` files at a time on threads sharing one model.
+
+    CTranslate2 releases the GIL and runs concurrent ``transcribe()`` calls on
+    separate model replicas, so a model loaded with ``num_workers >= streams``
+    serves all threads while its weights are in memory only once. New files
+    are only submitted as running ones finish, so at most ``streams``
+    decoded waveforms exist at a time; results come back in input order.
+
+    Args:
+        files: Files to process
+        model: ``WhisperModel`` loaded with ``num_workers`` of at least ``streams``
+        job_options: Keyword arguments for ``process_file``
+        export_options: Keyword arguments for ``write_outputs``
+        streams: Files transcribed concurrently
+    """
+    queued = iter(enumerate(files))
+    finished: Dict[int, BatchItem] = {}
+    next_index = 0
+    with ThreadPoolExecutor(max_workers=streams, thread_name_prefix="autoseg-stream") as executor:
+        def submit(count: int) -> Dict[Any, int]:
+            return {executor.submit(process_and_export, model, file_path, job_options, export_options): index
+                    for index, file_path in itertools.islice(queued, count)}
+
+        running = submit(streams)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[running.pop(future)] = future.result()
+            running.update(submit(len(done)))
+            # A long file holds back the results after it, but not the files after it
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+
+
+# --- Process pool ---
+# Per-process state, set up once by the pool initializer
+_worker_model = None
+_worker_load_error: Optional[str] = None
+_worker_load_seconds: Optional[float] = None
+_worker_job_options: Dict[str, Any] = {}
+_worker_export_options: Dict[str, Any] = {}
+
+
+def _init_worker(model_options: Dict[str, Any], job_options: Dict[str, Any],
+                 export_options: Dict[str, Any]) -> None:
+    """Load this worker's own model; runs once per pool process."""
+    global _worker_model, _worker_load_error, _worker_load_seconds, _worker_job_options, _worker_export_options
+    setup_logging()
+    _worker_job_options = job_options
+    _worker_export_options = export_options
+    start = time.perf_counter()
+    try:
+        _worker_model = load_whisper_model(**model_options)
+    except Exception as e:
+        # Raising here would make the pool respawn the worker forever
+        logger.error(f"Worker {os.getpid()} failed to load model: {e}")
+        _worker_load_error = describe_model_error(e)
+        return
+    _worker_load_seconds = time.perf_counter() - start
+    logger.info(f"Worker {os.getpid()} loaded model in {_worker_load_seconds:.1f}s")
+
+
+def _run_worker_job(file_path: str) -> BatchItem:
+    if _worker_load_error:
+        return file_path, None, _worker_load_error
+    item = process_and_export(_worker_model, file_path, _worker_job_options, _worker_export_options)
+    if item[1] is not None:
+        # The parent never sees this worker's model load, so report it with each job
+        item[1]["metrics"]["model_load_seconds"] = _worker_load_seconds
+    return item
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Split the machine's cores evenly between worker processes."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def iter_parallel_batch(files: List[str], model_options: Dict[str, Any], job_options: Dict[str, Any],
+                        export_options: Dict[str, Any], workers: int,
+                        cpu_threads: Optional[int] = None) -> Iterator[BatchItem]:
+    """Process files in ``workers`` processes, each holding its own model.
+
+    Files are handed out one at a time from the pool's task queue, so long
+    and short files balance across workers; results come back in input order.
+
+    Args:
+        files: Files to process
+        model_options: Keyword arguments for ``load_whisper_model``
+        job_options: Keyword arguments for ``process_file``
+        export_options: Keyword arguments for ``write_outputs``
+        workers: Number of worker processes
+        cpu_threads: CTranslate2 threads per worker, defaults to cores / workers
+    """
+    if cpu_threads is None:
+        cpu_threads = default_threads_per_worker(workers)
+    model_options = dict(model_options, cpu_threads=cpu_threads)
+    logger.info(f"Starting {workers} worker process(es) with {cpu_threads} thread(s) each")
+
+    # spawn gives every worker a clean interpreter on all platforms
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(model_options, job_options, export_options)
+    ) as pool:
+        yield from pool.imap(_run_worker_job, files, chunksize=1)
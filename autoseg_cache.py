@@ -0,0 +1,463 @@
+"""On-disk caches for repeat runs over the same media.
+
+``TranscriptionCache`` stores word-level Whisper results in a SQLite database
+as zlib-compressed JSON blobs. Entries are keyed by a content hash of the input
+file plus every model and ``transcribe()`` argument that influences the result,
+so re-running a file with unchanged settings skips inference entirely.
+
+``AudioCache`` keeps the decoded 16 kHz PCM of recent inputs, so re-processing
+the same media with other settings skips the ffmpeg conversion.
+
+Both caches are size-capped with least-recently-used eviction and share one
+index of file content hashes keyed by path, size and mtime.
+"""
+import collections
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+from autoseg_audio import PCMStore, decode_to_file
+from autoseg_engine import TRANSCRIBE_OPTIONS, normalize_language
+from autoseg_errors import PipelineError, CancellationToken
+
+logger = logging.getLogger("autoseg.cache")
+
+DEFAULT_CACHE_DIR = Path.home() / ".autoseg" / "cache"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+DEFAULT_AUDIO_MAX_BYTES = 4 * 1024 * 1024 * 1024  # 4 GB, about 35 hours of 16 kHz PCM
+
+# Bump when the stored format or anything that affects results changes
+CACHE_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Lightweight stand-ins for faster-whisper's result types, enough for segmentation
+CachedWord = collections.namedtuple("CachedWord", "start end word probability")
+CachedSegment = collections.namedtuple("CachedSegment", "start end text words")
+CachedInfo = collections.namedtuple("CachedInfo", "language language_probability duration")
+
+
+class _SQLiteStore:
+    """Base for the caches: a SQLite database opened per operation."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Picklable so batch worker processes can share the same cache
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the cache usable from
+        # worker threads and from several batch processes at once
+        with self._lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                with conn:
+                    yield conn
+            finally:
+                conn.close()
+
+
+class FileHashIndex(_SQLiteStore):
+    """Remembers file content hashes per (path, size, mtime)."""
+
+    def __init__(self, directory: Path):
+        super().__init__(directory / "hashes.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_hashes ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL)"
+            )
+
+    def content_hash(self, file_path: str) -> str:
+        """Return a hash of the file's bytes.
+
+        Unchanged files (same path, size and mtime) are only read once.
+        """
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT digest FROM file_hashes WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        if row:
+            return row[0]
+
+        start = time.perf_counter()
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        logger.debug(f"Hashed {path} in {time.perf_counter() - start:.2f}s")
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest)
+            )
+        return digest
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM file_hashes")
+
+
+class TranscriptionCache(_SQLiteStore):
+    """Size-capped LRU cache of transcription results keyed by content and settings."""
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) the cache.
+
+        Args:
+            directory: Where the database lives, defaults to ``~/.autoseg/cache``
+            max_bytes: Total size of stored blobs before old entries are evicted
+        """
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        super().__init__(self.directory / "transcripts.sqlite3")
+        self.max_bytes = max_bytes
+        self.hashes = FileHashIndex(self.directory)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_access REAL NOT NULL, data BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def key_for(self, file_path: str, model_size: str, device: str, compute_type: str,
+                lang_code: Optional[str], use_vad: bool, beam_size: int,
+                chunk_seconds: Optional[float] = None) -> str:
+        """Build the cache key for transcribing ``file_path`` with these settings."""
+        params = {
+            "version": CACHE_VERSION,
+            "content": self.hashes.content_hash(file_path),
+            "model_size": model_size,
+            "device": device,
+            "compute_type": compute_type,
+            "language": normalize_language(lang_code),
+            "vad_filter": use_vad,
+            "beam_size": beam_size,
+            "options": TRANSCRIBE_OPTIONS,
+        }
+        if chunk_seconds is not None:
+            params["chunk_seconds"] = chunk_seconds
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, file_path: str, model_info: Dict[str, str], lang_code: Optional[str],
+               use_vad: bool, beam_size: int, chunk_seconds: Optional[float] = None
+               ) -> Tuple[Optional[str], Optional[Tuple[List[CachedSegment], CachedInfo]]]:
+        """Compute the key for a job and fetch its cached result.
+
+        Cache problems never fail a job: they are logged and the job simply
+        runs uncached.
+
+        Args:
+            file_path: Input media file
+            model_info: Dict with the model's ``size``, ``device`` and ``compute_type``
+            chunk_seconds: Chunk length if the file is transcribed in chunks
+
+        Returns:
+            ``(key, cached)`` where ``cached`` is ``(segments, info)`` or None;
+            ``key`` is None if the cache could not be used
+        """
+        try:
+            key = self.key_for(file_path, model_info["size"], model_info["device"],
+                               model_info["compute_type"], lang_code, use_vad, beam_size, chunk_seconds)
+            cached = self.get(key)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Transcription cache unavailable: {e}")
+            return None, None
+        logger.info(f"Transcription cache {'hit' if cached else 'miss'}: {file_path}")
+        return key, cached
+
+    def get(self, key: str) -> Optional[Tuple[List[CachedSegment], CachedInfo]]:
+        """Return ``(segments, info)`` for a cached transcription, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        try:
+            payload = json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Dropping corrupt cache entry {key[:12]}: {e}")
+            self.delete(key)
+            return None
+
+        segments = [
+            CachedSegment(seg["start"], seg["end"], seg["text"], [CachedWord(*w) for w in seg["words"]])
+            for seg in payload["segments"]
+        ]
+        info = CachedInfo(payload["language"], payload["language_probability"], payload["duration"])
+        return segments, info
+
+    def put(self, key: str, segments: List[Dict[str, Any]], info) -> None:
+        """Store serialized segments and evict old entries past the size cap."""
+        payload = {
+            "language": info.language,
+            "language_probability": getattr(info, "language_probability", None),
+            "duration": info.duration,
+            "segments": segments,
+        }
+        data = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 6)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, created, last_access, data) VALUES (?, ?, ?, ?, ?)",
+                (key, len(data), now, now, data)
+            )
+        self.evict()
+
+    def record(self, key: str, whisper_segments, info) -> Iterator[Any]:
+        """Pass Whisper segments through, storing them once the generator is exhausted.
+
+        A transcription that is abandoned half way is not cached.
+        """
+        recorded = []
+        for segment in whisper_segments:
+            recorded.append({
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "words": [[w.start, w.end, w.word, w.probability] for w in (segment.words or [])],
+            })
+            yield segment
+
+        try:
+            self.put(key, recorded, info)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store transcription in cache: {e}")
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        logger.info(f"Evicted {len(doomed)} transcription cache entr(ies)")
+        return len(doomed)
+
+    def clear(self) -> None:
+        """Invalidate every cached transcription."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+        self.hashes.clear()
+        logger.info("Transcription cache cleared")
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of entries and their total compressed size."""
+        with self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size}
+
+
+class AudioCache(_SQLiteStore):
+    """Size-capped LRU cache of decoded 16 kHz PCM files.
+
+    PCM files are named after the content hash of their source, so a renamed
+    or copied input still hits. Hit and miss counts are logged on every lookup.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: int = DEFAULT_AUDIO_MAX_BYTES):
+        """Open (or create) the cache.
+
+        Args:
+            directory: Cache root, PCM files go to its ``audio`` subdirectory
+            max_bytes: Disk quota for PCM files before old entries are evicted
+        """
+        self.directory = Path(directory) if directory else DEFAULT_CACHE_DIR
+        self.audio_dir = self.directory / "audio"
+        self.audio_dir.mkdir(parents=True, exist_ok=True)
+        super().__init__(self.directory / "audio.sqlite3")
+        self.max_bytes = max_bytes
+        self.hashes = FileHashIndex(self.directory)
+        self.hits = 0
+        self.misses = 0
+        # --streams and pipelined batches open files from several threads at once
+        self._counter_lock = threading.Lock()
+        self._decode_locks: Dict[str, threading.Lock] = {}  # Per digest, guarded by _counter_lock
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " digest TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        del state["_counter_lock"], state["_decode_locks"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._counter_lock = threading.Lock()
+        self._decode_locks = {}
+
+    def _pcm_path(self, digest: str) -> Path:
+        return self.audio_dir / f"{digest}.pcm"
+
+    def _decode_lock(self, digest: str) -> threading.Lock:
+        with self._counter_lock:
+            return self._decode_locks.setdefault(digest, threading.Lock())
+
+    def _count(self, hit: bool, file_path: str) -> None:
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            hits, misses = self.hits, self.misses
+        logger.info(f"Decoded-audio cache {'hit' if hit else 'miss'} ({hits} hits / {misses} misses): {file_path}")
+
+    def open(self, file_path: str, cancel_token: Optional[CancellationToken] = None) -> PCMStore:
+        """Return the decoded audio of ``file_path``, decoding it only on a miss.
+
+        Raises:
+            PipelineError: If the file has to be decoded and ffmpeg fails
+            JobCancelled: If the token was cancelled during the decode
+        """
+        # Already in the decoded format: mapping the file itself beats hashing and copying it
+        store = PCMStore.from_wav(file_path)
+        if store is not None:
+            return store
+
+        try:
+            digest = self.hashes.content_hash(file_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Decoded-audio cache unavailable: {e}")
+            return PCMStore.decode(file_path, cancel_token=cancel_token)
+        pcm_path = self._pcm_path(digest)
+
+        # One decode per file: a concurrent miss on the same file waits, then hits
+        with self._decode_lock(digest):
+            try:
+                with self._connect() as conn:
+                    row = conn.execute("SELECT size FROM entries WHERE digest = ?", (digest,)).fetchone()
+                    if row and pcm_path.exists() and pcm_path.stat().st_size == row[0]:
+                        conn.execute("UPDATE entries SET last_access = ? WHERE digest = ?", (time.time(), digest))
+                        hit = True
+                    else:
+                        hit = False
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Decoded-audio cache unavailable: {e}")
+                return PCMStore.decode(file_path, cancel_token=cancel_token)
+
+            if hit:
+                try:
+                    store = PCMStore(str(pcm_path))
+                except (OSError, ValueError, PipelineError) as e:
+                    # Evicted by another job between the check and the mapping
+                    logger.warning(f"Cached decoded audio vanished, decoding again: {e}")
+                else:
+                    self._count(True, file_path)
+                    store.from_cache = True
+                    return store
+
+            self._count(False, file_path)
+            decode_to_file(file_path, str(pcm_path), cancel_token)
+            size = pcm_path.stat().st_size
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (digest, size, last_access) VALUES (?, ?, ?)",
+                        (digest, size, time.time())
+                    )
+                self.evict(keep=digest)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to record decoded audio in cache: {e}")
+            return PCMStore(str(pcm_path))
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Delete least recently used PCM files until the cache fits ``max_bytes``.
+
+        Files that cannot be removed (e.g. still mapped on Windows) are kept
+        for a later pass.
+
+        Args:
+            keep: Digest that must survive, typically the entry just added
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            for digest, size in conn.execute("SELECT digest, size FROM entries ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                if digest == keep:
+                    continue
+                try:
+                    self._pcm_path(digest).unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.debug(f"Cannot evict {digest} yet: {e}")
+                    continue
+                conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                total -= size
+                removed += 1
+        logger.info(f"Evicted {removed} decoded-audio cache entr(ies)")
+        return removed
+
+    def clear(self) -> None:
+        """Delete every cached PCM file that is not in use."""
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+        logger.info("Decoded-audio cache cleared")
+
+    def stats(self) -> Dict[str, int]:
+        """Return entry count, total size and this session's hit/miss counters."""
+        with self._connect() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        return {"entries": count, "bytes": size, "hits": hits, "misses": misses}
@@ -0,0 +1,363 @@
+"""Headless batch command line for Autoseg.
+
+Usage::
+
+    python -m autoseg [options] INPUT [INPUT ...]
+
+INPUT can be a file, a glob pattern (``"recordings/**/*.mp4"``) or a
+directory. The Whisper model is loaded once and reused for every file, and
+the results are written as SRT/TXT/JSON next to each input.
+"""
+import argparse
+import glob
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from autoseg_engine import (
+    MODEL_SIZES, COMPUTE_TYPES, OUTPUT_FORMATS, CHUNK_SECONDS, PipelineError,
+    setup_logging, find_missing_dependencies, is_supported_file, detect_devices,
+    default_compute_type, load_whisper_model, describe_model_error, output_path_for
+)
+from autoseg_segmentation import SEGMENTATION_MODES
+from autoseg_batch import (
+    iter_serial_batch, iter_pipelined_batch, iter_threaded_batch, iter_parallel_batch, default_threads_per_worker
+)
+from autoseg_cache import (
+    TranscriptionCache, AudioCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_AUDIO_MAX_BYTES
+)
+from autoseg_metrics import JobMetrics, MetricsRecorder, DEFAULT_METRICS_DIR
+from autoseg_tuning import (
+    CALIBRATION_SECONDS, DEFAULT_TUNING_PATH, autotune, describe_config, load_tuned_config, save_tuned_config,
+    pick_winner
+)
+
+logger = logging.getLogger("autoseg.cli")
+
+
+def collect_inputs(inputs: List[str], recursive: bool = False) -> List[str]:
+    """Expand files, glob patterns and directories into a list of media files.
+
+    Order follows the command line; directory and glob matches are sorted.
+    Duplicates and unsupported files are dropped.
+    """
+    files = []
+    seen = set()
+
+    def add(path: Path) -> None:
+        key = str(path.resolve())
+        if key in seen:
+            return
+        if not is_supported_file(str(path)):
+            logger.warning(f"Skipping unsupported file: {path}")
+            return
+        seen.add(key)
+        files.append(str(path))
+
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            for child in sorted(path.glob(pattern)):
+                if child.is_file() and is_supported_file(str(child)):
+                    add(child)
+        elif path.is_file():
+            add(path)
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                logger.warning(f"No files match: {item}")
+            for match in matches:
+                if Path(match).is_file():
+                    add(Path(match))
+        else:
+            logger.warning(f"Input not found: {item}")
+
+    return files
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m autoseg",
+        description="Transcribe and segment audio/video files without the GUI."
+    )
+    parser.add_argument("inputs", nargs="*", help="Files, glob patterns or directories")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("--model", default="base", choices=MODEL_SIZES, help="Whisper model size (default: base)")
+    parser.add_argument("--device", default="auto", choices=["auto"] + list(COMPUTE_TYPES),
+                        help="Device to run on (default: auto)")
+    parser.add_argument("--compute-type",
+                        help="Compute type (default: the tuned one, see --autotune; otherwise int8 on CPU, "
+                             "float16 on CUDA)")
+    parser.add_argument("--language", default="", help="Two-letter language code, empty for auto-detection")
+    parser.add_argument("--no-vad", action="store_true", help="Disable the VAD filter")
+    parser.add_argument("--beam-size", type=int, default=5, help="Beam size, 1-20 (default: 5)")
+    parser.add_argument("--max-duration", type=int, default=60, help="Maximum segment length in seconds, 10-300 (default: 60)")
+    parser.add_argument("--segmentation", default="greedy", choices=SEGMENTATION_MODES,
+                        help="greedy splits while decoding; optimal balances segment lengths over "
+                             "the whole transcript (default: greedy)")
+    parser.add_argument("--formats", default="srt,txt,json",
+                        help="Comma separated output formats (default: srt,txt,json)")
+    parser.add_argument("-o", "--output-dir", help="Write outputs here instead of next to each input")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Skip inputs whose outputs already exist")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Worker processes, each with its own model (default: 1)")
+    parser.add_argument("--streams", type=int, default=1,
+                        help="Files transcribed concurrently on threads sharing one model loaded with "
+                             "num_workers=N; the memory-frugal alternative to -j (default: 1)")
+    parser.add_argument("--prefetch", type=int, default=1,
+                        help="Files decoded ahead while the model transcribes, with outputs written in the "
+                             "background; 0 runs the steps strictly one after another (default: 1)")
+    parser.add_argument("--cpu-threads", type=int,
+                        help="CPU threads per worker (default: all cores split evenly between workers)")
+    parser.add_argument("--chunk-workers", type=int, default=1,
+                        help="Split long files at silences and transcribe the chunks on this many threads "
+                             "(default: 1, no chunking)")
+    parser.add_argument("--chunk-minutes", type=float, default=CHUNK_SECONDS / 60,
+                        help=f"Target chunk length for --chunk-workers (default: {CHUNK_SECONDS / 60:g})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the transcription and decoded-audio caches")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                        help=f"Transcription cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Transcription cache size cap in MB, least recently used entries are evicted "
+                             f"(default: {DEFAULT_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--audio-cache-mb", type=int, default=DEFAULT_AUDIO_MAX_BYTES // (1024 * 1024),
+                        help="Disk quota for decoded audio in MB, 0 disables the decoded-audio cache "
+                             f"(default: {DEFAULT_AUDIO_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Invalidate all cached transcriptions and decoded audio before processing")
+    parser.add_argument("--metrics-dir", default=str(DEFAULT_METRICS_DIR),
+                        help=f"Write a JSON timing summary per file here (default: {DEFAULT_METRICS_DIR})")
+    parser.add_argument("--no-metrics", action="store_true", help="Do not write per-file JSON summaries")
+    parser.add_argument("--prometheus-file",
+                        help="Keep a Prometheus text-format metrics file (e.g. for node_exporter's "
+                             "textfile collector) up to date")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Calibrate compute type, CPU threads and workers for --model/--device on this "
+                             f"machine using the first INPUT as calibration clip, and save the fastest in "
+                             f"{DEFAULT_TUNING_PATH}")
+    parser.add_argument("--calibration-seconds", type=float, default=CALIBRATION_SECONDS,
+                        help=f"Length of the --autotune calibration clip (default: {CALIBRATION_SECONDS})")
+    parser.add_argument("--no-tuning", action="store_true",
+                        help="Ignore the saved --autotune result and use the built-in defaults")
+    return parser
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.clear_cache:
+        parser.error("at least one input is required")
+
+    args.formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in args.formats if fmt not in OUTPUT_FORMATS]
+    if unknown or not args.formats:
+        parser.error(f"--formats must be a subset of {','.join(OUTPUT_FORMATS)}")
+    if args.max_duration < 10 or args.max_duration > 300:
+        parser.error("--max-duration must be between 10 and 300")
+    if args.beam_size < 1 or args.beam_size > 20:
+        parser.error("--beam-size must be between 1 and 20")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.prefetch < 0:
+        parser.error("--prefetch must not be negative")
+    if args.streams < 1:
+        parser.error("--streams must be at least 1")
+    if args.streams > 1 and args.workers > 1:
+        parser.error("--streams and -j/--workers cannot be combined")
+    if args.cpu_threads is not None and args.cpu_threads < 1:
+        parser.error("--cpu-threads must be at least 1")
+    if args.chunk_workers < 1:
+        parser.error("--chunk-workers must be at least 1")
+    if args.chunk_minutes < 1:
+        parser.error("--chunk-minutes must be at least 1")
+    if args.cache_size_mb < 1:
+        parser.error("--cache-size-mb must be at least 1")
+    if args.audio_cache_mb < 0:
+        parser.error("--audio-cache-mb must not be negative")
+    if args.calibration_seconds < 5:
+        parser.error("--calibration-seconds must be at least 5")
+
+    if args.device == "auto":
+        args.device = "cuda" if "cuda" in detect_devices() else "cpu"
+    # Explicit --compute-type/--cpu-threads always win over the tuned configuration
+    args.tuned = None
+    if not args.compute_type and not args.no_tuning and not args.autotune:
+        # Tuned for as many transcriptions at once as this run keeps going
+        args.tuned = load_tuned_config(args.model, args.device, streams=args.streams * args.chunk_workers)
+        if args.tuned:
+            logger.info(f"Using tuned configuration for {args.model}/{args.device}: {describe_config(args.tuned)}")
+    if not args.compute_type:
+        args.compute_type = args.tuned["compute_type"] if args.tuned else default_compute_type(args.device)
+    return args
+
+
+def run_autotune(args: argparse.Namespace) -> int:
+    """Calibrate the candidate configurations on the first input and save the winner."""
+    clips = collect_inputs(args.inputs[:1])
+    if not clips:
+        logger.error("--autotune needs a media file as calibration clip")
+        return 1
+
+    def report(result) -> None:
+        if "error" in result:
+            print(f"{describe_config(result):<44} failed: {result['error']}")
+        else:
+            print(f"{describe_config(result):<44} RTF {result['rtf']:>7.3f}  "
+                  f"peak RSS {result['peak_rss_mb'] or 0:>7.0f} MB  load {result['load_seconds']:>5.1f}s")
+
+    try:
+        tuning = autotune(args.model, args.device, clips[0], args.language, not args.no_vad, args.beam_size,
+                          args.calibration_seconds, result_callback=report)
+    except PipelineError as e:
+        logger.error(str(e))
+        return 1
+    winner = tuning["winner"]
+    if winner is None:
+        logger.error("Every candidate configuration failed, nothing saved")
+        return 1
+    save_tuned_config(args.model, args.device, tuning)
+    print(f"Fastest for {args.model}/{args.device}: {describe_config(winner)} (RTF {winner['rtf']:.3f})")
+    serial = pick_winner([result for result in tuning["results"] if result["num_workers"] == 1])
+    if serial is not None and serial is not winner:
+        # Used by runs without --streams/--chunk-workers
+        print(f"Fastest one file at a time: {describe_config(serial)} (RTF {serial['rtf']:.3f})")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point, returns the process exit code."""
+    setup_logging()
+    args = parse_args(argv)
+    if args.autotune:
+        return run_autotune(args)
+
+    cache, audio_cache = None, None
+    if not args.no_cache or args.clear_cache:
+        cache = TranscriptionCache(args.cache_dir, args.cache_size_mb * 1024 * 1024)
+        audio_cache = AudioCache(args.cache_dir, args.audio_cache_mb * 1024 * 1024)
+        if args.clear_cache:
+            cache.clear()
+            audio_cache.clear()
+        if args.no_cache:
+            cache, audio_cache = None, None
+        elif args.audio_cache_mb == 0:
+            audio_cache = None
+    if not args.inputs:
+        return 0
+
+    missing_deps = find_missing_dependencies(["faster-whisper", "ffmpeg-python"])
+    if missing_deps:
+        logger.error(f"Missing dependencies: {missing_deps}. Run: pip install {' '.join(missing_deps)}")
+        return 1
+
+    files = collect_inputs(args.inputs, args.recursive)
+    if args.skip_existing:
+        files = [f for f in files
+                 if not all(output_path_for(f, fmt, args.output_dir).exists() for fmt in args.formats)]
+    if not files:
+        logger.error("No input files to process")
+        return 1
+    logger.info(f"Batch of {len(files)} file(s)")
+
+    model_options = {"size": args.model, "device": args.device, "compute_type": args.compute_type}
+    if args.chunk_workers > 1 or args.streams > 1:
+        # One CTranslate2 worker per concurrent transcribe() call, or the calls would queue up
+        model_options["num_workers"] = args.streams * args.chunk_workers
+    job_options = {
+        "max_duration": args.max_duration,
+        "lang_code": args.language,
+        "use_vad": not args.no_vad,
+        "beam_size": args.beam_size,
+        "segmentation": args.segmentation,
+        "cache": cache,
+        "model_info": {"size": args.model, "device": args.device, "compute_type": args.compute_type},
+        "audio_cache": audio_cache,
+        "chunk_workers": args.chunk_workers,
+        "chunk_seconds": args.chunk_minutes * 60,
+    }
+    export_options = {
+        "formats": args.formats,
+        "model_size": args.model,
+        "device": args.device,
+        "compute_type": args.compute_type,
+        "output_dir": args.output_dir,
+    }
+
+    metrics = MetricsRecorder(None if args.no_metrics else args.metrics_dir, args.prometheus_file)
+
+    batch_start = time.perf_counter()
+    workers = min(args.workers, len(files))
+    # Cores are shared between worker processes and the chunk threads inside each
+    cpu_threads = args.cpu_threads
+    streams = min(args.streams, len(files))
+    if (cpu_threads is None and args.tuned and workers == 1
+            and args.tuned["num_workers"] == streams * args.chunk_workers):
+        # The tuned threads were measured with this many transcriptions sharing the machine
+        cpu_threads = args.tuned["cpu_threads"] or None
+    if cpu_threads is None and (args.chunk_workers > 1 or streams > 1):
+        cpu_threads = default_threads_per_worker(workers * streams * args.chunk_workers)
+    if workers > 1:
+        results = iter_parallel_batch(files, model_options, job_options, export_options,
+                                      workers, cpu_threads)
+    else:
+        if cpu_threads:
+            model_options["cpu_threads"] = cpu_threads
+        try:
+            model = load_whisper_model(**model_options)
+        except Exception as e:
+            logger.error(describe_model_error(e))
+            return 1
+        load_seconds = time.perf_counter() - batch_start
+        metrics.record_model_load(load_seconds)
+        logger.info(f"Model loaded in {load_seconds:.1f}s")
+        if streams > 1:
+            results = iter_threaded_batch(files, model, job_options, export_options, streams)
+        elif args.prefetch and len(files) > 1:
+            results = iter_pipelined_batch(files, model, job_options, export_options, args.prefetch)
+        else:
+            results = iter_serial_batch(files, model, job_options, export_options)
+
+    failed = []
+    audio_seconds = 0.0
+    for index, (file_path, result, error) in enumerate(results, 1):
+        if error:
+            logger.error(f"[{index}/{len(files)}] Failed: {file_path}: {error}")
+            failed.append(file_path)
+            if result is None:
+                # Failed before the job started, e.g. the worker's model did not load
+                job = JobMetrics(file_path)
+                job.error = error
+                result = {"metrics": job.to_dict()}
+            metrics.record(result["metrics"])
+            continue
+
+        audio_seconds += result["duration"]
+        logger.info(
+            f"[{index}/{len(files)}] {file_path}: {len(result['segments'])} segments in "
+            f"{result['elapsed']:.1f}s, wrote {', '.join(Path(p).name for p in result['outputs'])}"
+        )
+        metrics.record(result["metrics"])
+
+    elapsed = time.perf_counter() - batch_start
+    logger.info(
+        f"Batch finished: {len(files) - len(failed)} succeeded, {len(failed)} failed, "
+        f"{audio_seconds / 3600:.2f} h of audio in {elapsed / 3600:.2f} h "
+        f"({audio_seconds / elapsed if elapsed else 0.0:.2f} audio-hours per wall-hour, {workers} worker(s), "
+        f"{streams} stream(s))"
+    )
+    if audio_cache is not None and workers == 1:
+        # Worker processes count their own hits, which show up in their log lines
+        logger.info(f"Decoded-audio cache: {audio_cache.hits} hit(s), {audio_cache.misses} miss(es)")
+    for file_path in failed:
+        logger.error(f"Failed: {file_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,754 @@
+"""GUI-free transcription engine shared by the Tk app and the batch CLI.
+
+Everything here runs without a display: audio decoding, Whisper model
+loading, transcription, smart segmentation and the SRT/TXT/JSON writers.
+Heavy third-party modules are imported inside the functions that need them so
+that the engine can be imported on machines without the full toolchain.
+"""
+import dataclasses
+import importlib.util
+import json
+import logging
+import os
+import time
+import traceback
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, Iterator
+
+from autoseg_audio import SAMPLE_RATE, PCMStore, decode_audio
+from autoseg_errors import PipelineError, JobCancelled, CancellationToken
+from autoseg_metrics import JobMetrics
+from autoseg_segmentation import iter_smart_segments, perform_optimal_segmentation
+
+logger = logging.getLogger("autoseg.engine")
+
+# Supported file formats
+SUPPORTED_FORMATS = {
+    'audio': ['.mp3', '.wav', '.m4a', '.flac', '.aac', '.ogg'],
+    'video': ['.mp4', '.mov', '.avi', '.mkv', '.webm']
+}
+
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large-v1", "large-v2", "large-v3"]
+
+# Available compute types per device, the first entry is the default
+COMPUTE_TYPES = {
+    # 对于 Ampere 及更高版本的 GPU，int8_float16 是一个很好的选择
+    'cuda': ["float16", "int8_float16", "int8"],
+    'cpu': ["int8", "int16", "float32"],
+}
+
+# Fixed decoding options passed to every transcribe() call
+TRANSCRIBE_OPTIONS = {
+    'word_timestamps': True,
+    'temperature': 0.0,  # Use deterministic decoding
+    'compression_ratio_threshold': 2.4,
+    'log_prob_threshold': -1.0,
+    'no_speech_threshold': 0.6,
+}
+
+# Chunked transcription of long files: chunk length, and how far around each
+# target cut to look for the quietest spot
+CHUNK_SECONDS = 300
+CHUNK_SEARCH_SECONDS = 30
+SILENCE_FRAME_SECONDS = 0.05
+
+# Minimum wall time between two transcription progress reports
+PROGRESS_INTERVAL = 0.5
+
+# pip package name -> importable module
+DEPENDENCY_MODULES = {
+    'faster-whisper': 'faster_whisper',
+    'ffmpeg-python': 'ffmpeg',
+    'pydub': 'pydub',
+}
+
+# Packages the GUI needs; the batch CLI does without pydub
+GUI_DEPENDENCIES = ["faster-whisper", "ffmpeg-python", "pydub"]
+
+StatusCallback = Callable[[str], None]
+SegmentCallback = Callable[[Dict[str, Any]], None]
+ProgressCallback = Callable[[Dict[str, float]], None]
+AudioCallback = Callable[[PCMStore, Any], None]
+
+
+def setup_logging(name: str = "autoseg") -> logging.Logger:
+    """Set up logging configuration for the application."""
+    # Create logs directory if it doesn't exist
+    log_dir = Path("logs")
+    log_dir.mkdir(exist_ok=True)
+
+    # Configure logging with rotation
+    log_file = log_dir / "autoseg.log"
+
+    # Create formatter
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+    )
+
+    # Create logger
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+
+    # Avoid duplicate handlers
+    if not logger.handlers:
+        # File handler with rotation
+        try:
+            from logging.handlers import RotatingFileHandler
+            file_handler = RotatingFileHandler(
+                log_file, maxBytes=10*1024*1024, backupCount=5  # 10MB max, 5 backups
+            )
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(formatter)
+            logger.addHandler(file_handler)
+        except Exception:
+            # Fallback to basic file handler
+            file_handler = logging.FileHandler(log_file)
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(formatter)
+            logger.addHandler(file_handler)
+
+        # Console handler
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+
+    return logger
+
+
+def find_missing_dependencies(packages: Iterable[str]) -> List[str]:
+    """Return the pip names of the given packages that cannot be imported.
+
+    Only the import system is searched; nothing is imported, so the check
+    costs milliseconds even for faster-whisper.
+    """
+    missing = []
+    for package in packages:
+        try:
+            found = importlib.util.find_spec(DEPENDENCY_MODULES[package]) is not None
+        except (ImportError, ValueError):
+            found = False
+        if not found:
+            missing.append(package)
+    return missing
+
+
+def is_supported_file(file_path: str) -> bool:
+    """Check whether the file extension is one we know how to process."""
+    file_ext = Path(file_path).suffix.lower()
+    return file_ext in SUPPORTED_FORMATS['audio'] + SUPPORTED_FORMATS['video']
+
+
+def detect_devices() -> List[str]:
+    """Return the devices Whisper can run on, e.g. ``["cpu", "cuda"]``.
+
+    Asks CTranslate2, the inference backend of faster-whisper, rather than
+    torch: it is what actually runs the model, and it loads in a fraction
+    of the time.
+    """
+    devices = ["cpu"]
+    try:
+        import ctranslate2
+
+        # Check CUDA availability
+        gpu_count = ctranslate2.get_cuda_device_count()
+        if gpu_count > 0:
+            devices.append("cuda")
+            logger.info(f"CUDA available: {gpu_count} GPU(s)")
+        else:
+            logger.info("CUDA not available, using CPU")
+    except ImportError:
+        logger.info("ctranslate2 not installed, using CPU")
+    except Exception as e:
+        # A broken CUDA driver raises instead of reporting zero devices
+        logger.warning(f"CUDA probing failed, using CPU: {e}")
+    return devices
+
+
+def default_compute_type(device: str) -> str:
+    """Return the default compute type for a device."""
+    return COMPUTE_TYPES.get(device, COMPUTE_TYPES['cpu'])[0]
+
+
+def load_whisper_model(size: str, device: str, compute_type: str, **kwargs):
+    """Load a faster-whisper model.
+
+    Args:
+        size: Model size, e.g. ``base`` or ``large-v3``
+        device: ``cpu`` or ``cuda``
+        compute_type: CTranslate2 compute type
+        **kwargs: Extra ``WhisperModel`` arguments such as ``cpu_threads``
+
+    Returns:
+        The loaded ``WhisperModel``
+    """
+    from faster_whisper import WhisperModel
+
+    logger.info(f"Loading Whisper model: size={size}, device={device}, compute_type={compute_type}")
+    return WhisperModel(
+        size,
+        device=device,
+        compute_type=compute_type,
+        download_root=None,  # Use default cache directory
+        local_files_only=False,
+        **kwargs
+    )
+
+
+def describe_model_error(error: Exception) -> str:
+    """Turn a model loading exception into a user-facing message."""
+    # Provide more specific error messages
+    if "CUDA" in str(error) and "out of memory" in str(error).lower():
+        return "GPU内存不足，请尝试使用CPU或更小的模型"
+    if "No module named" in str(error):
+        return f"缺少依赖库: {error}"
+    if "Connection" in str(error) or "timeout" in str(error).lower():
+        return "网络连接问题，无法下载模型。请检查网络连接或使用本地模型"
+    return f"模型加载失败: {str(error)}"
+
+
+def normalize_language(lang_code: Optional[str]) -> Optional[str]:
+    """Validate a language code, returning None for auto-detection."""
+    if lang_code:
+        lang_code = lang_code.strip()
+    if lang_code and len(lang_code) != 2:
+        logger.warning(f"Invalid language code: {lang_code}, using auto-detection")
+        return None
+    return lang_code or None
+
+
+def transcribe_audio(model, audio, lang_code: Optional[str], use_vad: bool, beam_size: int) -> Tuple[Any, Any]:
+    """Start a Whisper transcription.
+
+    Args:
+        model: Loaded ``WhisperModel``
+        audio: 16 kHz float32 waveform from ``decode_audio`` (a file path also works)
+        lang_code: Two-letter language code, empty for auto-detection
+        use_vad: Whether to enable the VAD filter
+        beam_size: Beam size for decoding
+
+    Returns:
+        Tuple of the lazy segment generator and the transcription info
+    """
+    try:
+        segments, info = model.transcribe(
+            audio,
+            language=normalize_language(lang_code),
+            vad_filter=use_vad,
+            beam_size=beam_size,
+            **TRANSCRIBE_OPTIONS
+        )
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}")
+        logger.error(traceback.format_exc())
+        raise PipelineError(f"语音识别失败: {e}") from e
+
+    logger.info(f"Transcription started. Detected language: {info.language}")
+    return segments, info
+
+
+def find_silence_cuts(audio, chunk_seconds: float = CHUNK_SECONDS) -> List[int]:
+    """Choose sample offsets that split ``audio`` into chunks of about ``chunk_seconds``.
+
+    Each cut is placed at the quietest short frame within
+    ``CHUNK_SEARCH_SECONDS`` of its target, so words are rarely split. Only
+    the search windows are read, which keeps this cheap on memory-mapped audio.
+
+    Returns:
+        Sorted offsets starting with 0 and ending with ``len(audio)``
+    """
+    import numpy as np
+
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    search = int(min(CHUNK_SEARCH_SECONDS, chunk_seconds / 4) * SAMPLE_RATE)
+    frame = int(SILENCE_FRAME_SECONDS * SAMPLE_RATE)
+
+    cuts = [0]
+    # Stop early enough that the last chunk is never a short sliver
+    while total - cuts[-1] > chunk + chunk // 2:
+        target = cuts[-1] + chunk
+        lo, hi = target - search, min(total, target + search)
+        window = np.asarray(audio[lo:hi], dtype=np.float32)
+        frames = len(window) // frame
+        energy = np.square(window[:frames * frame].reshape(frames, frame)).mean(axis=1)
+        cuts.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+    cuts.append(total)
+    return cuts
+
+
+def _replace(item, **changes):
+    # faster-whisper results are NamedTuples in older releases, dataclasses in newer ones
+    if hasattr(item, "_replace"):
+        return item._replace(**changes)
+    return dataclasses.replace(item, **changes)
+
+
+def _shift_segment(segment, offset: float):
+    """Move a chunk-relative Whisper segment and its words to absolute time."""
+    words = segment.words
+    if words:
+        words = [_replace(w, start=w.start + offset, end=w.end + offset) for w in words]
+    return _replace(segment, start=segment.start + offset, end=segment.end + offset, words=words)
+
+
+def transcribe_chunked(model, audio, lang_code: Optional[str], use_vad: bool, beam_size: int,
+                       workers: int, chunk_seconds: float = CHUNK_SECONDS,
+                       cancel_token: Optional[CancellationToken] = None) -> Tuple[Iterable[Any], Any]:
+    """Transcribe a long waveform as silence-aligned chunks on several threads.
+
+    CTranslate2 releases the GIL, so with a model loaded with
+    ``num_workers >= workers`` the chunks decode in parallel. The first chunk
+    is started on its own so that, when auto-detecting, every chunk uses the
+    language detected there. Cancelling ``cancel_token``, closing the
+    returned iterator or an error in any chunk also stops the chunks that are
+    already running.
+
+    Returns:
+        Like ``transcribe_audio``: segments in time order with absolute word
+        timestamps, and the info of the first chunk covering the whole duration
+    """
+    cuts = find_silence_cuts(audio, chunk_seconds)
+    chunks = list(zip(cuts[:-1], cuts[1:]))
+    logger.info(f"Transcribing {len(chunks)} chunk(s) of ~{chunk_seconds / 60:.0f} min with {workers} worker(s)")
+
+    first_segments, info = transcribe_audio(model, audio[:cuts[1]], lang_code, use_vad, beam_size)
+    language = normalize_language(lang_code) or info.language
+
+    # The chunks poll a token of their own, so that they can be stopped when
+    # the caller gives up on the results even if no token was passed in
+    stop = CancellationToken()
+    unlink = cancel_token.on_cancel(stop.cancel) if cancel_token is not None else (lambda: None)
+
+    def collect(segments, offset: float) -> List[Any]:
+        return [_shift_segment(segment, offset) for segment in stop.guard(segments)]
+
+    def run_chunk(start: int, end: int) -> List[Any]:
+        segments, _ = transcribe_audio(model, audio[start:end], language, use_vad, beam_size)
+        return collect(segments, start / SAMPLE_RATE)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="autoseg-chunk")
+    futures = [executor.submit(collect, first_segments, 0.0)]
+    futures += [executor.submit(run_chunk, start, end) for start, end in chunks[1:]]
+
+    def shut_down() -> None:
+        stop.cancel()
+        unlink()
+        # Same as shutdown(cancel_futures=True), which needs Python 3.9
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    def iter_results() -> Iterable[Any]:
+        # Chunks are yielded in order, so segmentation can start on the first
+        # one while later chunks are still decoding
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            shut_down()
+
+    results = iter_results()
+    # A generator that never started skips its finally when it is discarded
+    weakref.finalize(results, shut_down)
+    return results, _replace(info, duration=len(audio) / SAMPLE_RATE)
+
+
+def track_progress(whisper_segments, duration: float, callback: Callable[[Dict[str, float]], None],
+                   interval: float = PROGRESS_INTERVAL) -> Iterator[Any]:
+    """Pass Whisper segments through, reporting how far into the audio decoding has got.
+
+    The end timestamp of each segment is measured against ``duration``.
+    ``callback`` receives ``position``, ``duration``, ``fraction``, ``speed``
+    (audio seconds per wall second) and ``eta`` (seconds). It is called at most
+    once per ``interval`` plus once at the end, so a fast model cannot flood
+    the GUI queue.
+    """
+    start = time.monotonic()
+    last_report = start
+    position = 0.0
+
+    def report(now: float) -> None:
+        elapsed = now - start
+        speed = position / elapsed if elapsed > 0 else 0.0
+        callback({
+            "position": position,
+            "duration": duration,
+            "fraction": min(1.0, position / duration) if duration else 0.0,
+            "speed": speed,
+            "eta": max(0.0, duration - position) / speed if speed > 0 else None,
+        })
+
+    for segment in whisper_segments:
+        position = max(position, segment.end)
+        now = time.monotonic()
+        if now - last_report >= interval:
+            last_report = now
+            report(now)
+        yield segment
+    position = duration
+    report(time.monotonic())
+
+
+def format_progress(progress: Dict[str, float]) -> str:
+    """Status line for a ``track_progress`` report."""
+    text = f"语音识别 {progress['fraction']:.1%}，速度 {progress['speed']:.1f}x 实时"
+    if progress["eta"] is not None and progress["fraction"] < 1:
+        text += f"，预计剩余 {format_timestamp(progress['eta']).split('.')[0]}"
+    return text
+
+
+def segment_transcription(whisper_segments, max_duration: int,
+                          segment_callback: Optional[SegmentCallback] = None,
+                          mode: str = "greedy") -> List[Dict[str, Any]]:
+    """Run smart segmentation, raising PipelineError when nothing was recognized.
+
+    In ``greedy`` mode segments are produced while Whisper is still decoding
+    and ``segment_callback`` receives each one as soon as it closes. The
+    ``optimal`` mode needs the whole transcript first, so the callback only
+    fires once decoding has finished.
+    """
+    final_segments = []
+    try:
+        if mode == "optimal":
+            segment_iter = iter(perform_optimal_segmentation(whisper_segments, max_duration))
+        else:
+            segment_iter = iter_smart_segments(whisper_segments, max_duration)
+        for segment in segment_iter:
+            final_segments.append(segment)
+            if segment_callback:
+                segment_callback(segment)
+    except PipelineError:
+        raise
+    except Exception as e:
+        logger.error(f"Segmentation failed: {e}")
+        logger.error(traceback.format_exc())
+        raise PipelineError(f"分段处理失败: {e}") from e
+
+    if not final_segments:
+        raise PipelineError("未检测到任何语音内容，请检查音频文件")
+
+    logger.info(f"Segmentation completed: {len(final_segments)} segments")
+    return final_segments
+
+
+def prefetch_input(file_path: str, lang_code: Optional[str] = None, use_vad: bool = True, beam_size: int = 5,
+                   status_callback: Optional[StatusCallback] = None,
+                   cache=None, model_info: Optional[Dict[str, str]] = None,
+                   audio_cache=None, chunk_workers: int = 1, chunk_seconds: float = CHUNK_SECONDS,
+                   metrics: Optional[JobMetrics] = None,
+                   cancel_token: Optional[CancellationToken] = None,
+                   in_memory: bool = False, keep_audio: bool = False, **_ignored) -> Dict[str, Any]:
+    """Step 1 of ``process_file``: everything that does not need the model.
+
+    Looks the file up in the transcription cache and, on a miss, decodes it.
+    Pipelined batches run this for the next file while the model is busy
+    with the current one. The decoded audio stays a memory-mapped 16-bit
+    ``PCMStore`` until transcription starts, so a file waiting in a prefetch
+    queue costs disk rather than heap; pass the result to ``process_file``
+    as ``prepared``, or to ``discard_input`` if it will not be processed.
+
+    Takes the same keyword arguments as ``process_file`` and ignores those
+    only the later steps need.
+
+    Args:
+        in_memory: Decode straight into a float32 array instead of a
+            ``PCMStore`` when there is no ``audio_cache``, for immediate use
+        keep_audio: Decode even on a transcription cache hit, e.g. for playback
+
+    Returns:
+        Dict with ``file_path``, ``metrics`` (a ``JobMetrics``), ``cache_key``
+        and ``cached``, plus ``pcm_store`` or ``audio`` unless the
+        transcription cache hit and ``keep_audio`` is not set
+    """
+    if status_callback:
+        status_callback("步骤 1/3: 解码音频...")
+    logger.info(f"Starting audio processing: {file_path}")
+    if metrics is None:
+        metrics = JobMetrics(file_path)
+    prepared = {"file_path": file_path, "metrics": metrics, "cache_key": None, "cached": None}
+
+    # Chunk boundaries can change the result, so chunked runs are cached separately
+    chunking = chunk_seconds if chunk_workers > 1 else None
+    if cache is not None and model_info:
+        with metrics.step("load"):
+            prepared["cache_key"], prepared["cached"] = cache.lookup(
+                file_path, model_info, lang_code, use_vad, beam_size, chunking
+            )
+        metrics.cache["transcription"] = "hit" if prepared["cached"] else "miss"
+        if prepared["cached"] and not keep_audio:
+            return prepared
+
+    with metrics.step("decode"):
+        if audio_cache is not None:
+            prepared["pcm_store"] = audio_cache.open(file_path, cancel_token)
+            # Per store rather than from the counters, which concurrent jobs share
+            if not prepared["pcm_store"].direct:
+                metrics.cache["audio"] = "hit" if prepared["pcm_store"].from_cache else "miss"
+        elif in_memory:
+            prepared["audio"] = decode_audio(file_path, cancel_token)
+        else:
+            prepared["pcm_store"] = PCMStore.decode(file_path, cancel_token=cancel_token)
+    return prepared
+
+
+def discard_input(prepared: Dict[str, Any]) -> None:
+    """Release the decoded audio of a ``prefetch_input`` result that will not be processed."""
+    pcm_store = prepared.pop("pcm_store", None)
+    if pcm_store is not None:
+        pcm_store.close()
+    prepared.pop("audio", None)
+
+
+def process_file(model, file_path: str, max_duration: int, lang_code: Optional[str] = None,
+                 use_vad: bool = True, beam_size: int = 5,
+                 status_callback: Optional[StatusCallback] = None,
+                 segment_callback: Optional[SegmentCallback] = None,
+                 cache=None, model_info: Optional[Dict[str, str]] = None,
+                 audio_cache=None, chunk_workers: int = 1,
+                 chunk_seconds: float = CHUNK_SECONDS, segmentation: str = "greedy",
+                 metrics: Optional[JobMetrics] = None,
+                 cancel_token: Optional[CancellationToken] = None,
+                 prepared: Optional[Dict[str, Any]] = None,
+                 progress_callback: Optional[ProgressCallback] = None,
+                 audio_callback: Optional[AudioCallback] = None) -> Dict[str, Any]:
+    """Run the full decode -> transcribe -> segment pipeline on one file.
+
+    Args:
+        model: Loaded ``WhisperModel``, reused across calls
+        file_path: Audio or video file to process
+        max_duration: Maximum segment length in seconds
+        lang_code: Two-letter language code, empty for auto-detection
+        use_vad: Whether to enable the VAD filter
+        beam_size: Beam size for decoding
+        status_callback: Optional callable receiving progress messages
+        segment_callback: Optional callable receiving each segment as it closes
+        cache: Optional ``TranscriptionCache``; a hit skips decoding and inference
+        model_info: ``size``/``device``/``compute_type`` of ``model``, needed for the cache key
+        audio_cache: Optional ``AudioCache``; a hit skips the ffmpeg conversion
+        chunk_workers: Transcribe long files as chunks on this many threads;
+            the model needs ``num_workers`` at least this large to run them in parallel
+        chunk_seconds: Target chunk length for chunked transcription
+        segmentation: ``greedy`` (streaming) or ``optimal`` segmentation
+        metrics: Optional ``JobMetrics`` to fill in, e.g. to keep timings of a failed job
+        cancel_token: Optional ``CancellationToken``; cancelling kills ffmpeg and
+            stops transcription before the next segment
+        prepared: Result of ``prefetch_input`` for this file; step 1 is then skipped
+            and ``prepared["metrics"]`` is used
+        progress_callback: Optional callable receiving ``track_progress`` reports
+        audio_callback: Optional callable receiving the decoded ``PCMStore`` and
+            Whisper's info once transcription has started, e.g. to play back
+            segments while the rest is still decoding. It takes ownership of the
+            store, which is then decoded even on a transcription cache hit.
+
+    Returns:
+        Dict with ``file_path``, ``detected_lang``, ``duration``, ``segments``
+        and the job's ``metrics`` summary
+
+    Raises:
+        PipelineError: If any step fails
+        JobCancelled: If ``cancel_token`` was cancelled
+    """
+    def report(message: str) -> None:
+        if status_callback:
+            status_callback(message)
+
+    if prepared is None:
+        prepared = prefetch_input(file_path, lang_code, use_vad, beam_size, status_callback, cache, model_info,
+                                  audio_cache, chunk_workers, chunk_seconds, metrics, cancel_token,
+                                  in_memory=audio_callback is None, keep_audio=audio_callback is not None)
+    metrics = prepared["metrics"]
+    cache_key, cached = prepared["cache_key"], prepared["cached"]
+    chunking = chunk_seconds if chunk_workers > 1 else None
+    pcm_store = prepared.pop("pcm_store", None)
+
+    try:
+        if cached:
+            report("步骤 2/3: 命中转录缓存，跳过语音识别...")
+            segments, info = cached
+            duration = info.duration
+        else:
+            audio = prepared.pop("audio", None)
+            if audio is None:
+                with metrics.step("load"):
+                    audio = pcm_store.to_float32()
+                if audio_callback is None:
+                    pcm_store.close()
+                    pcm_store = None
+            duration = len(audio) / SAMPLE_RATE
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            logger.info(f"Audio loaded: {duration / 60:.1f} minutes")
+            if duration > 3600:
+                report(f"音频时长 {duration / 60:.1f} 分钟，处理可能需要较长时间...")
+
+            report("步骤 2/3: 使用 Whisper 进行语音识别...")
+            with metrics.step("transcribe"):
+                if chunking and duration > chunk_seconds * 1.5:
+                    segments, info = transcribe_chunked(model, audio, lang_code, use_vad, beam_size,
+                                                        chunk_workers, chunk_seconds, cancel_token)
+                else:
+                    segments, info = transcribe_audio(model, audio, lang_code, use_vad, beam_size)
+            del audio
+            if cancel_token is not None:
+                # Checked between segments; a cancelled run is never cached
+                segments = cancel_token.guard(segments)
+            if cache_key:
+                segments = cache.record(cache_key, segments, info)
+        metrics.audio_seconds = duration
+
+        if audio_callback is not None and pcm_store is not None:
+            store, pcm_store = pcm_store, None
+            audio_callback(store, info)
+    finally:
+        if pcm_store is not None:
+            pcm_store.close()
+
+    report("步骤 3/3: 智能分段并整理结果...")
+    # Whisper decodes while segmentation pulls segments; book that time as transcription
+    transcribed = metrics.steps["transcribe"]
+    with metrics.step("segment"):
+        whisper_segments = metrics.timed_segments(segments)
+        if progress_callback:
+            whisper_segments = track_progress(whisper_segments, duration, progress_callback)
+        final_segments = segment_transcription(whisper_segments, max_duration, segment_callback, segmentation)
+    metrics.steps["segment"] -= metrics.steps["transcribe"] - transcribed
+    metrics.segments = len(final_segments)
+
+    return {
+        "file_path": file_path,
+        "detected_lang": info.language,
+        "duration": duration,
+        "segments": final_segments,
+        "metrics": metrics.to_dict(),
+    }
+
+
+def format_timestamp(seconds: float, separator: str = ".") -> str:
+    """Format seconds as ``HH:MM:SS.mmm`` (SRT uses ``,`` as separator)."""
+    return f"{time.strftime('%H:%M:%S', time.gmtime(seconds))}{separator}{int((seconds % 1) * 1000):03d}"
+
+
+def format_result_row(number: int, seg: Dict[str, Any]) -> Tuple[int, str, str]:
+    """Column values of a segment in the GUI results list: number, time range, text."""
+    return number, f"{format_timestamp(seg['start'])} - {format_timestamp(seg['end'])}", seg["text"]
+
+
+def write_txt(file_handle, segments: List[Dict[str, Any]], source: str, model_size: str,
+              device: str, compute_type: str) -> None:
+    """Write results in plain text format."""
+    # Write header information
+    file_handle.write(f"音频转录结果\n")
+    file_handle.write(f"=" * 50 + "\n")
+    file_handle.write(f"源文件: {source}\n")
+    file_handle.write(f"模型: {model_size}\n")
+    file_handle.write(f"设备: {device}\n")
+    file_handle.write(f"计算精度: {compute_type}\n")
+    file_handle.write(f"生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    file_handle.write(f"总段数: {len(segments)}\n\n")
+
+    # Write segments
+    for i, seg in enumerate(segments):
+        start_str = format_timestamp(seg["start"])
+        end_str = format_timestamp(seg["end"])
+
+        file_handle.write(f"段落 {i+1}: {start_str} --> {end_str}\n")
+        file_handle.write(f"{seg['text'].strip()}\n\n")
+
+
+def write_srt(file_handle, segments: List[Dict[str, Any]]) -> None:
+    """Write results in SRT subtitle format."""
+    for i, seg in enumerate(segments):
+        write_srt_entry(file_handle, i + 1, seg)
+
+
+def write_srt_entry(file_handle, number: int, seg: Dict[str, Any]) -> None:
+    """Write one numbered SRT cue."""
+    # Convert to SRT time format (HH:MM:SS,mmm)
+    start_str = format_timestamp(seg["start"], ",")
+    end_str = format_timestamp(seg["end"], ",")
+
+    file_handle.write(f"{number}\n")
+    file_handle.write(f"{start_str} --> {end_str}\n")
+    file_handle.write(f"{seg['text'].strip()}\n\n")
+
+
+def write_json(file_handle, result: Dict[str, Any], model_size: str, device: str, compute_type: str) -> None:
+    """Write results and the settings that produced them as JSON."""
+    json.dump({
+        "source": result["file_path"],
+        "detected_lang": result["detected_lang"],
+        "duration": result["duration"],
+        "model": {"size": model_size, "device": device, "compute_type": compute_type},
+        "segments": result["segments"],
+    }, file_handle, ensure_ascii=False, indent=2)
+
+
+OUTPUT_FORMATS = ("srt", "txt", "json")
+
+
+def output_path_for(file_path: str, fmt: str, output_dir: Optional[str] = None) -> Path:
+    """Return where an export of ``file_path`` in format ``fmt`` is written."""
+    source = Path(file_path)
+    directory = Path(output_dir) if output_dir else source.parent
+    return directory / f"{source.stem}.{fmt}"
+
+
+class StreamingSRTWriter:
+    """Append SRT cues to ``<name>.srt.part`` as segments close.
+
+    Subtitles of a long job can be inspected while it is still running; the
+    file is renamed to its final ``.srt`` name by ``commit``.
+    """
+
+    def __init__(self, out_path: Path):
+        self.out_path = out_path
+        self.part_path = out_path.with_name(out_path.name + ".part")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.part_path, 'w', encoding='utf-8')
+        self._count = 0
+
+    def __call__(self, seg: Dict[str, Any]) -> None:
+        self._count += 1
+        write_srt_entry(self._file, self._count, seg)
+        self._file.flush()
+
+    def commit(self) -> Path:
+        """Close the partial file and move it into place."""
+        self._file.close()
+        os.replace(self.part_path, self.out_path)
+        return self.out_path
+
+    def discard(self) -> None:
+        """Close and delete the partial file after a failed job."""
+        self._file.close()
+        try:
+            os.remove(self.part_path)
+        except OSError:
+            pass
+
+
+def write_outputs(result: Dict[str, Any], formats: Iterable[str], model_size: str, device: str,
+                  compute_type: str, output_dir: Optional[str] = None) -> List[Path]:
+    """Write the requested export formats next to the input (or into output_dir).
+
+    Returns:
+        Paths of the files written
+    """
+    written = []
+    for fmt in formats:
+        out_path = output_path_for(result["file_path"], fmt, output_dir)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8') as f:
+            if fmt == "srt":
+                write_srt(f, result["segments"])
+            elif fmt == "txt":
+                write_txt(f, result["segments"], result["file_path"], model_size, device, compute_type)
+            elif fmt == "json":
+                write_json(f, result, model_size, device, compute_type)
+            else:
+                raise ValueError(f"Unknown output format: {fmt}")
+        written.append(out_path)
+    return written
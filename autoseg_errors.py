@@ -0,0 +1,74 @@
+"""Exceptions and cancellation shared by the Autoseg processing modules."""
+import threading
+from typing import Any, Callable, Iterable, Iterator, List
+
+
+class PipelineError(Exception):
+    """A processing step failed; the message is meant to be shown to the user."""
+
+
+class JobCancelled(PipelineError):
+    """The job was cancelled by the user."""
+
+    def __init__(self, message: str = "处理已取消"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """Cooperative cancellation of one job.
+
+    Long-running steps either poll the token (``raise_if_cancelled``,
+    ``guard``) or register a callback that interrupts them, e.g. killing
+    an ffmpeg subprocess. ``cancel`` may be called from any thread.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation and run the registered callbacks once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """Run ``callback`` on cancellation, immediately if already cancelled.
+
+        Returns:
+            A function that unregisters the callback once it is no longer needed
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+
+        def remove() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return remove
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def guard(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Pass ``items`` through, stopping with ``JobCancelled`` between two items."""
+        for item in items:
+            self.raise_if_cancelled()
+            yield item
+        self.raise_if_cancelled()
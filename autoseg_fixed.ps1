@@ -113,7 +113,7 @@ try {
 if (-not $NoCheck) {
     Write-ColorText "[信息] 检查依赖库..." "Blue"
     
-    $checkResult = python -c "from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" 2>$null
+    $checkResult = python -c "import sys; from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" 2>$null
     
     if ($LASTEXITCODE -ne 0) {
         Write-ColorText "[警告] 发现缺少的依赖库" "Yellow"
@@ -124,16 +124,16 @@ if (-not $NoCheck) {
         if ($install -eq "n" -or $install -eq "N") {
             Write-ColorText "[信息] 跳过依赖库安装" "Yellow"
             Write-ColorText "您可以稍后运行以下命令安装:" "White"
-            Write-ColorText "pip install faster-whisper ffmpeg-python pydub torch ttkthemes" "Cyan"
+            Write-ColorText "pip install faster-whisper ffmpeg-python pydub ttkthemes" "Cyan"
             Read-Host "按回车键退出"
             exit 1
         }
         
         Write-ColorText "[信息] 正在安装依赖库..." "Blue"
-        pip install faster-whisper ffmpeg-python pydub torch ttkthemes
+        pip install faster-whisper ffmpeg-python pydub ttkthemes
         
         Write-ColorText "[信息] 重新检查依赖库..." "Blue"
-        $recheckResult = python -c "from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" 2>$null
+        $recheckResult = python -c "import sys; from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" 2>$null
         if ($LASTEXITCODE -ne 0) {
             Write-ColorText "[错误] 依赖检查仍然失败，请手动安装" "Red"
             Read-Host "按回车键退出"
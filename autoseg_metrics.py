@@ -0,0 +1,200 @@
+"""Per-job timing metrics.
+
+Each processed file gets a ``JobMetrics`` record with the duration of the
+four pipeline steps (decode, load, transcribe, segment), the audio length,
+real-time factor, words per second, segment count, model load time and
+cache outcomes. ``MetricsRecorder`` writes one JSON summary per job and can
+keep a Prometheus text-format file up to date for node_exporter's textfile
+collector.
+"""
+import itertools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator
+
+logger = logging.getLogger("autoseg.metrics")
+
+DEFAULT_METRICS_DIR = Path.home() / ".autoseg" / "metrics"
+
+STEPS = ("decode", "load", "transcribe", "segment")
+
+# Numbers the JSON summaries written by this process, so that names never collide
+_json_sequence = itertools.count(1)
+
+
+class JobMetrics:
+    """Timings and counters of one processed file."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.started = time.time()
+        self.steps = {name: 0.0 for name in STEPS}
+        self.audio_seconds = 0.0
+        self.words = 0
+        self.segments = 0
+        self.model_load_seconds: Optional[float] = None
+        self.cache: Dict[str, str] = {}  # cache name -> "hit" / "miss"
+        self.error: Optional[str] = None
+        self.cancelled = False
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to step ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] += time.perf_counter() - start
+
+    def timed_segments(self, whisper_segments: Iterable[Any]) -> Iterator[Any]:
+        """Pass Whisper segments through, booking the time spent producing them as transcription.
+
+        Whisper decodes lazily while segmentation consumes the generator, so
+        this is how the two interleaved steps are told apart.
+        """
+        iterator = iter(whisper_segments)
+        while True:
+            start = time.perf_counter()
+            try:
+                segment = next(iterator)
+            except StopIteration:
+                self.steps["transcribe"] += time.perf_counter() - start
+                return
+            self.steps["transcribe"] += time.perf_counter() - start
+            self.words += len(segment.words or [])
+            yield segment
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready summary; derived rates are computed from the steps."""
+        processing = sum(self.steps.values())
+        return {
+            "file_path": self.file_path,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "status": "cancelled" if self.cancelled else "error" if self.error else "ok",
+            "error": self.error,
+            "steps": self.steps,
+            "processing_seconds": processing,
+            "audio_seconds": self.audio_seconds,
+            "rtf": processing / self.audio_seconds if self.audio_seconds else None,
+            "words": self.words,
+            "words_per_second": self.words / processing if processing else None,
+            "segments": self.segments,
+            "model_load_seconds": self.model_load_seconds,
+            "cache": self.cache,
+        }
+
+
+class MetricsRecorder:
+    """Collects job summaries into JSON files and Prometheus counters."""
+
+    def __init__(self, json_dir: Optional[Path] = None, prometheus_path: Optional[Path] = None):
+        """
+        Args:
+            json_dir: Directory for one ``<time>_<pid>-<n>_<name>.json`` summary per job, None to skip
+            prometheus_path: ``.prom`` file rewritten after every job, None to skip
+        """
+        self.json_dir = Path(json_dir) if json_dir else None
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self._lock = threading.Lock()
+        self._jobs = {"ok": 0, "error": 0, "cancelled": 0}
+        self._step_seconds = {name: 0.0 for name in STEPS}
+        self._audio_seconds = 0.0
+        self._words = 0
+        self._segments = 0
+        self._cache = {}
+        self._last: Dict[str, Any] = {}
+        self.model_load_seconds: Optional[float] = None
+
+    def record(self, summary: Dict[str, Any]) -> None:
+        """Store one job summary (``JobMetrics.to_dict()``) and update the totals."""
+        if summary.get("model_load_seconds") is None:
+            summary["model_load_seconds"] = self.model_load_seconds
+        logger.info(
+            f"Job metrics: {Path(summary['file_path']).name} "
+            + " ".join(f"{name}={seconds:.2f}s" for name, seconds in summary["steps"].items())
+            + (f" rtf={summary['rtf']:.3f}" if summary["rtf"] is not None else "")
+        )
+        with self._lock:
+            self._jobs[summary["status"]] += 1
+            for name, seconds in summary["steps"].items():
+                self._step_seconds[name] = self._step_seconds.get(name, 0.0) + seconds
+            self._audio_seconds += summary["audio_seconds"]
+            self._words += summary["words"]
+            self._segments += summary["segments"]
+            for cache, outcome in summary["cache"].items():
+                self._cache[(cache, outcome)] = self._cache.get((cache, outcome), 0) + 1
+            self._last = summary
+            try:
+                if self.json_dir:
+                    self._write_json(summary)
+                if self.prometheus_path:
+                    self._write_prometheus()
+            except OSError as e:
+                logger.error(f"Failed to write metrics: {e}")
+
+    def record_model_load(self, seconds: float) -> None:
+        """Remember the load time of the model that serves the following jobs."""
+        self.model_load_seconds = seconds
+
+    def _write_json(self, summary: Dict[str, Any]) -> None:
+        self.json_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f".{int(now * 1000) % 1000:03d}"
+        # Same-named inputs from different folders can finish within the same millisecond
+        name = f"{stamp}_{os.getpid()}-{next(_json_sequence)}_{Path(summary['file_path']).stem}.json"
+        path = self.json_dir / name
+        path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def _write_prometheus(self) -> None:
+        lines = [
+            "# HELP autoseg_jobs_total Processed files by outcome.",
+            "# TYPE autoseg_jobs_total counter",
+        ]
+        lines += [f'autoseg_jobs_total{{status="{status}"}} {count}' for status, count in self._jobs.items()]
+        lines += [
+            "# HELP autoseg_step_seconds_total Time spent per pipeline step.",
+            "# TYPE autoseg_step_seconds_total counter",
+        ]
+        lines += [f'autoseg_step_seconds_total{{step="{name}"}} {seconds:.6f}'
+                  for name, seconds in self._step_seconds.items()]
+        lines += [
+            "# HELP autoseg_audio_seconds_total Audio processed.",
+            "# TYPE autoseg_audio_seconds_total counter",
+            f"autoseg_audio_seconds_total {self._audio_seconds:.3f}",
+            "# HELP autoseg_words_total Words recognized.",
+            "# TYPE autoseg_words_total counter",
+            f"autoseg_words_total {self._words}",
+            "# HELP autoseg_segments_total Segments produced.",
+            "# TYPE autoseg_segments_total counter",
+            f"autoseg_segments_total {self._segments}",
+            "# HELP autoseg_cache_lookups_total Cache lookups by cache and outcome.",
+            "# TYPE autoseg_cache_lookups_total counter",
+        ]
+        lines += [f'autoseg_cache_lookups_total{{cache="{cache}",outcome="{outcome}"}} {count}'
+                  for (cache, outcome), count in sorted(self._cache.items())]
+        if self._last.get("rtf") is not None:
+            lines += [
+                "# HELP autoseg_last_job_rtf Real-time factor of the most recent job.",
+                "# TYPE autoseg_last_job_rtf gauge",
+                # No per-file label: one series per input would pile up stale series
+                f"autoseg_last_job_rtf {self._last['rtf']:.6f}",
+            ]
+        if self.model_load_seconds is not None:
+            lines += [
+                "# HELP autoseg_model_load_seconds Load time of the current model.",
+                "# TYPE autoseg_model_load_seconds gauge",
+                f"autoseg_model_load_seconds {self.model_load_seconds:.3f}",
+            ]
+
+        # node_exporter may read at any moment, so replace the file atomically
+        self.prometheus_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.prometheus_path.parent,
+                                         suffix=".tmp", delete=False) as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(f.name, self.prometheus_path)
@@ -0,0 +1,194 @@
+"""Registry of loaded Whisper models.
+
+Loading a model takes seconds to tens of seconds, so models stay resident
+after use and switching back to a recent configuration is instant. Models are
+keyed by ``(size, device, compute_type)`` and evicted least recently used once
+their estimated footprint exceeds the memory budget.
+"""
+import collections
+import gc
+import logging
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+
+from autoseg_audio import SAMPLE_RATE
+from autoseg_engine import load_whisper_model
+
+logger = logging.getLogger("autoseg.models")
+
+ModelKey = Tuple[str, str, str]
+
+DEFAULT_POOL_BYTES = 8 * 1024 * 1024 * 1024  # 8 GB
+
+# Approximate parameter counts, used to estimate resident size before loading
+MODEL_PARAMETERS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large-v1": 1_550_000_000,
+    "large-v2": 1_550_000_000,
+    "large-v3": 1_550_000_000,
+}
+
+BYTES_PER_PARAMETER = {
+    "float32": 4,
+    "float16": 2,
+    "int16": 2,
+    "int8_float16": 1,
+    "int8": 1,
+}
+
+# Activations, decoding buffers and allocator slack on top of the weights
+MODEL_OVERHEAD_FACTOR = 1.3
+
+
+def estimate_model_bytes(size: str, compute_type: str) -> int:
+    """Estimate the memory a loaded model occupies."""
+    parameters = MODEL_PARAMETERS.get(size, MODEL_PARAMETERS["large-v3"])
+    return int(parameters * BYTES_PER_PARAMETER.get(compute_type, 4) * MODEL_OVERHEAD_FACTOR)
+
+
+def release_model(model) -> None:
+    """Free a model's weights now instead of whenever the last reference dies.
+
+    Only call this once nothing is transcribing with ``model`` any more.
+    """
+    # CTranslate2 can drop the weights explicitly, which also returns GPU memory
+    unload = getattr(getattr(model, "model", None), "unload_model", None)
+    if unload is not None:
+        try:
+            unload()
+        except Exception as e:
+            logger.warning(f"Failed to unload model weights: {e}")
+    del model
+    gc.collect()
+
+
+class ModelPool:
+    """LRU registry of ``WhisperModel`` instances under a memory budget.
+
+    The model returned by ``get`` is never evicted by that same call, so a
+    configuration larger than the budget still loads; it just evicts
+    everything else. Callers must not keep using a model after releasing it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_POOL_BYTES):
+        """Create an empty pool.
+
+        Args:
+            max_bytes: Estimated memory all resident models may occupy together
+        """
+        self.max_bytes = max_bytes
+        self._models: "collections.OrderedDict[ModelKey, Any]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, size: str, device: str, compute_type: str, **kwargs):
+        """Return a resident model, loading it if needed.
+
+        Args:
+            size: Model size, e.g. ``base`` or ``large-v3``
+            device: ``cpu`` or ``cuda``
+            compute_type: CTranslate2 compute type
+            **kwargs: Extra ``WhisperModel`` arguments, only used when loading
+
+        Returns:
+            The loaded ``WhisperModel``
+        """
+        key = (size, device, compute_type)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                logger.info(f"Reusing resident model: size={size}, device={device}, compute_type={compute_type}")
+                return model
+
+            # Make room first so the old and new weights do not peak together
+            self._evict(estimate_model_bytes(size, compute_type), keep=None)
+            start = time.perf_counter()
+            model = load_whisper_model(size, device, compute_type, **kwargs)
+            logger.info(f"Model {size}/{device}/{compute_type} loaded in {time.perf_counter() - start:.1f}s")
+            self._models[key] = model
+            return model
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._models
+
+    def keys(self) -> List[ModelKey]:
+        """Resident models, least recently used first."""
+        return list(self._models)
+
+    def resident_bytes(self) -> int:
+        """Estimated memory of all resident models."""
+        return sum(estimate_model_bytes(size, compute_type) for size, _, compute_type in self._models)
+
+    def _evict(self, incoming: int, keep: Optional[ModelKey]) -> None:
+        # Called with the lock held
+        total = self.resident_bytes() + incoming
+        for key in list(self._models):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= estimate_model_bytes(key[0], key[2])
+            logger.info(f"Evicting model {'/'.join(key)} to stay within {self.max_bytes / 1024 ** 3:.1f} GB")
+            release_model(self._models.pop(key))
+
+    def set_budget(self, max_bytes: int, keep: Optional[ModelKey] = None) -> None:
+        """Change the memory budget, evicting models that no longer fit.
+
+        Args:
+            max_bytes: New budget
+            keep: Model that must stay resident, e.g. the one in use
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict(0, keep)
+
+    def release(self, size: str, device: str, compute_type: str) -> bool:
+        """Unload one model and free its memory.
+
+        Returns:
+            True if the model was resident
+        """
+        with self._lock:
+            model = self._models.pop((size, device, compute_type), None)
+        if model is None:
+            return False
+        logger.info(f"Releasing model {size}/{device}/{compute_type}")
+        release_model(model)
+        return True
+
+    def release_all(self) -> None:
+        """Unload every resident model."""
+        with self._lock:
+            models, self._models = list(self._models.values()), collections.OrderedDict()
+        for model in models:
+            release_model(model)
+        if models:
+            logger.info(f"Released {len(models)} model(s)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Resident model keys and their estimated total size."""
+        return {"models": self.keys(), "bytes": self.resident_bytes(), "max_bytes": self.max_bytes}
+
+
+def warm_up_model(model, seconds: float = 1.0) -> None:
+    """Run a tiny inference so the first real job does not pay first-call costs.
+
+    Kernel selection, memory pools and lazy initialisation inside CTranslate2
+    all happen on the first ``transcribe()``. Failures are logged and ignored.
+    """
+    import numpy as np
+
+    start = time.perf_counter()
+    try:
+        audio = np.zeros(int(SAMPLE_RATE * seconds), dtype=np.float32)
+        segments, _ = model.transcribe(audio, language="en", beam_size=1, vad_filter=False)
+        for _ in segments:
+            pass
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {e}")
+        return
+    logger.info(f"Model warmed up in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,297 @@
+"""Smart segmentation of Whisper word timestamps into subtitle-sized chunks."""
+import logging
+import re
+from itertools import chain
+from operator import attrgetter
+from typing import Iterator, List, Dict, Any
+
+logger = logging.getLogger("autoseg.segmentation")
+
+# Sentence-ending punctuation for different languages
+SENTENCE_ENDINGS = {
+    'en': '.?!',
+    'zh': '。？！',
+    'ja': '。？！',
+    'ko': '.?!。？！',
+    'es': '.?!¿¡',
+    'fr': '.?!',
+    'de': '.?!',
+    'ru': '.?!',
+    'ar': '.؟!',
+}
+
+# Use comprehensive punctuation set
+ALL_PUNCTUATION = ''.join(SENTENCE_ENDINGS.values())
+_PUNCTUATION_RE = re.compile(f"[{re.escape(ALL_PUNCTUATION)}]")
+
+_word_start = attrgetter('start')
+_word_end = attrgetter('end')
+_word_text = attrgetter('word')
+
+# Backtracking limits shared by both segmentation engines
+SEARCH_WORDS = 10
+PAUSE_SECONDS = 0.5
+
+# "greedy" is the streaming backtracking segmenter, "optimal" the DP one
+SEGMENTATION_MODES = ("greedy", "optimal")
+
+# Cost model of the optimal segmenter: a squared penalty for deviating from
+# the target length, in units of a tolerance, minus a reward for splitting
+# after sentence-ending punctuation or before a long pause. The tolerance is
+# capped in seconds, so a long maximum does not buy more freedom to chase
+# punctuation than the greedy segmenter's ten-word backtracking has; with a
+# reward of 0.3 a split moves at most ~0.55 tolerances to reach a boundary.
+TARGET_LENGTH_RATIO = 0.9
+LENGTH_TOLERANCE_RATIO = 0.35
+LENGTH_TOLERANCE_SECONDS = 8.0
+PUNCTUATION_REWARD = 0.3
+PAUSE_REWARD = 0.3
+
+
+def _iter_word_groups(whisper_segments) -> Iterator[Any]:
+    """Yield the non-empty word lists of Whisper segments, pulling segments lazily."""
+    for segment in whisper_segments:
+        if hasattr(segment, 'words') and segment.words:
+            yield segment.words
+
+
+def iter_smart_segments(whisper_segments, max_len_sec: int) -> Iterator[Dict[str, Any]]:
+    """Incrementally segment transcribed audio while Whisper is still decoding.
+
+    Consumes the faster-whisper segment generator lazily and yields each
+    segment as soon as it closes. Only the words of the currently open segment
+    are buffered: the punctuation and pause backtracking never looks further
+    back than the open segment, so memory stays bounded by ``max_len_sec``.
+
+    Whisper segments whose words all end within the limit are appended in
+    bulk; only the segment holding the over-length word is walked word by
+    word, so the Python work is per output segment rather than per word.
+
+    Args:
+        whisper_segments: Iterator of Whisper transcription segments
+        max_len_sec: Maximum length of each segment in seconds
+
+    Yields:
+        Segment dictionaries with 'start', 'end', and 'text' keys
+    """
+    groups = _iter_word_groups(whisper_segments)
+    # One Whisper segment of look-ahead tells us whether a word is the last one
+    next_group = next(groups, None)
+    if next_group is None:
+        logger.warning("No words found in transcription segments")
+        return
+
+    window: List[Any] = []  # Words of the open segment
+    current_segment_start = next_group[0].start
+    word_count = 0
+    segment_count = 0
+
+    while next_group is not None:
+        group = next_group
+        next_group = next(groups, None)
+        word_count += len(group)
+
+        # No word of this Whisper segment reaches the limit, so none can close the open segment
+        if next_group is not None and max(map(_word_end, group)) - current_segment_start < max_len_sec:
+            window.extend(group)
+            continue
+
+        last_index = len(group) - 1
+        for k, word in enumerate(group):
+            window.append(word)
+            is_last_word = next_group is None and k == last_index
+
+            # Continue if under max duration and not the last word
+            if word.end - current_segment_start < max_len_sec and not is_last_word:
+                continue
+
+            # Find the best split point (backtrack from current word)
+            i = len(window) - 1
+            best_split_index = i
+
+            if not is_last_word:  # Don't backtrack if forced to split at the end
+                # Look for sentence-ending punctuation within reasonable range
+                search_range = min(SEARCH_WORDS, i)  # Look back up to 10 words
+
+                for j in range(i, i - search_range, -1):
+                    if _PUNCTUATION_RE.search(window[j].word):
+                        best_split_index = j
+                        break
+
+                # If no punctuation found, look for natural pauses (longer gaps)
+                if best_split_index == i and i > 0:
+                    for j in range(i, i - search_range, -1):
+                        gap = window[j].start - window[j-1].end
+                        if gap > PAUSE_SECONDS:  # 500ms pause
+                            best_split_index = j - 1
+                            break
+
+            # Create segment, only yielding non-empty ones
+            segment_text = "".join(w.word for w in window[:best_split_index + 1]).strip()
+            if segment_text:
+                segment_count += 1
+                yield {
+                    "start": current_segment_start,
+                    "end": window[best_split_index].end,
+                    "text": segment_text
+                }
+
+            # Start new segment with the words after the split point
+            window = window[best_split_index + 1:]
+            if window:
+                current_segment_start = window[0].start
+            elif k < last_index:
+                current_segment_start = group[k + 1].start
+            elif next_group is not None:
+                current_segment_start = next_group[0].start
+
+    logger.info(f"Created {segment_count} segments from {word_count} words")
+
+
+class WordArrays:
+    """Struct-of-arrays view of a transcript's words.
+
+    Timestamps are float64 arrays (exactly the values of the Python floats),
+    ``texts`` keeps the raw word strings for joining, and ``punct`` flags
+    words containing sentence-ending punctuation.
+    """
+
+    def __init__(self, starts, ends, texts: List[str]):
+        import numpy as np
+
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.texts = texts
+
+        # One regex pass over the concatenated text instead of a per-word scan;
+        # match offsets map back to words through the cumulative lengths
+        boundaries = np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)))
+        hits = np.fromiter((m.start() for m in _PUNCTUATION_RE.finditer("".join(texts))), dtype=np.int64)
+        self.punct = np.zeros(len(texts), dtype=bool)
+        self.punct[np.searchsorted(boundaries, hits, side='right')] = True
+
+    @classmethod
+    def from_segments(cls, whisper_segments) -> "WordArrays":
+        """Collect the words of Whisper segments into arrays."""
+        import numpy as np
+
+        words = list(chain.from_iterable(_iter_word_groups(whisper_segments)))
+        # map() and fromiter() keep the per-word attribute access in C
+        return cls(
+            np.fromiter(map(_word_start, words), dtype=np.float64, count=len(words)),
+            np.fromiter(map(_word_end, words), dtype=np.float64, count=len(words)),
+            list(map(_word_text, words)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+
+def perform_smart_segmentation(whisper_segments, max_len_sec: int) -> List[Dict[str, Any]]:
+    """Perform intelligent segmentation of transcribed audio.
+
+    This function takes Whisper transcription segments and intelligently splits them
+    into segments of appropriate length, preferring to break at sentence boundaries.
+    It drains ``iter_smart_segments``.
+
+    Args:
+        whisper_segments: Iterator of Whisper transcription segments
+        max_len_sec: Maximum length of each segment in seconds
+
+    Returns:
+        List of segment dictionaries with 'start', 'end', and 'text' keys
+    """
+    return list(iter_smart_segments(whisper_segments, max_len_sec))
+
+
+def optimal_segment_word_arrays(words: WordArrays, max_len_sec: int) -> List[Dict[str, Any]]:
+    """Segment a transcript by minimizing the total split cost.
+
+    Every segment pays ``((length - target) / tolerance) ** 2`` with the target
+    at ``TARGET_LENGTH_RATIO * max_len_sec`` and the tolerance a share of the
+    target, at most ``LENGTH_TOLERANCE_SECONDS``; splitting after punctuation
+    or before a pause of more than ``PAUSE_SECONDS`` earns a reward. Segments
+    never exceed ``max_len_sec`` unless a single word does. The dynamic
+    program only considers segment starts within ``max_len_sec`` of each end,
+    so it runs in time linear in the number of words.
+
+    Args:
+        words: Transcript words
+        max_len_sec: Maximum length of each segment in seconds
+
+    Returns:
+        List of segment dictionaries with 'start', 'end', and 'text' keys
+    """
+    import numpy as np
+
+    count = len(words)
+    if count == 0:
+        logger.warning("No words found in transcription segments")
+        return []
+
+    starts, ends, texts = words.starts, words.ends, words.texts
+    target = TARGET_LENGTH_RATIO * max_len_sec
+    tolerance = min(LENGTH_TOLERANCE_RATIO * target, LENGTH_TOLERANCE_SECONDS)
+
+    reward = np.where(words.punct, PUNCTUATION_REWARD, 0.0)
+    reward[:-1] += np.where(starts[1:] - ends[:-1] > PAUSE_SECONDS, PAUSE_REWARD, 0.0)
+    reward[-1] = 0.0  # The transcript ends there anyway
+
+    # Earliest admissible start for each end word; the running maximum keeps
+    # the search valid when Whisper emits slightly out-of-order timestamps
+    running_start = np.maximum.accumulate(starts)
+    earliest = np.searchsorted(running_start, ends - max_len_sec, side='left')
+
+    # cost[k] is the cheapest segmentation of the first k words
+    cost = np.empty(count + 1)
+    cost[0] = 0.0
+    split = np.zeros(count + 1, dtype=np.int64)
+    for last in range(count):
+        first = min(int(earliest[last]), last)
+        lengths = ends[last] - starts[first:last + 1]
+        candidates = cost[first:last + 1] + np.square((lengths - target) / tolerance)
+        # The cost alone does not cap the length; out-of-order starts can still
+        # reach past the limit, but a segment of just this word is always allowed
+        over = lengths > max_len_sec
+        over[-1] = False
+        candidates[over] = np.inf
+        best = int(np.argmin(candidates))
+        cost[last + 1] = candidates[best] - reward[last]
+        split[last + 1] = first + best
+
+    # Walk the split points back from the end
+    bounds = []
+    end = count
+    while end > 0:
+        bounds.append((int(split[end]), end))
+        end = split[end]
+
+    segments = []
+    for first, end in reversed(bounds):
+        segment_text = "".join(texts[first:end]).strip()
+        if segment_text:
+            segments.append({
+                "start": float(starts[first]),
+                "end": float(ends[end - 1]),
+                "text": segment_text
+            })
+
+    logger.info(f"Created {len(segments)} segments from {count} words (optimal)")
+    return segments
+
+
+def perform_optimal_segmentation(whisper_segments, max_len_sec: int) -> List[Dict[str, Any]]:
+    """Segment transcribed audio with the dynamic-programming segmenter.
+
+    Unlike ``perform_smart_segmentation`` it weighs every admissible split,
+    which gives more even segment lengths at the cost of needing the whole
+    transcript before the first segment is known.
+
+    Args:
+        whisper_segments: Iterator of Whisper transcription segments
+        max_len_sec: Maximum length of each segment in seconds
+
+    Returns:
+        List of segment dictionaries with 'start', 'end', and 'text' keys
+    """
+    return optimal_segment_word_arrays(WordArrays.from_segments(whisper_segments), max_len_sec)
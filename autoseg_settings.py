@@ -0,0 +1,73 @@
+"""Persisted user settings.
+
+The GUI remembers the last model and transcription configuration in
+``~/.autoseg/settings.json`` so the next launch can restore it and start
+loading the same model straight away.
+"""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger("autoseg.settings")
+
+DEFAULT_SETTINGS_PATH = Path.home() / ".autoseg" / "settings.json"
+
+# Keys that are persisted, with their expected types
+SETTINGS_SCHEMA = {
+    "model_size": str,
+    "device": str,
+    "compute_type": str,
+    "language": str,
+    "use_vad": bool,
+    "beam_size": int,
+    "max_duration": int,
+    "segmentation": str,
+    "model_pool_gb": int,
+    "preload_model": bool,
+    "chunk_workers": int,
+    "prometheus_file": str,
+}
+
+
+def load_settings(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Read saved settings, dropping unknown keys and values of the wrong type.
+
+    A missing or unreadable file yields an empty dict, so first launches and
+    corrupt files both fall back to the defaults.
+    """
+    path = Path(path) if path else DEFAULT_SETTINGS_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable settings file {path}: {e}")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    settings = {}
+    for key, expected in SETTINGS_SCHEMA.items():
+        value = data.get(key)
+        # bool is an int subclass, so check it explicitly
+        if isinstance(value, expected) and (expected is bool or not isinstance(value, bool)):
+            settings[key] = value
+    return settings
+
+
+def save_settings(settings: Dict[str, Any], path: Optional[Path] = None) -> None:
+    """Write settings atomically so a crash never leaves a half-written file."""
+    path = Path(path) if path else DEFAULT_SETTINGS_PATH
+    data = {key: value for key, value in settings.items() if key in SETTINGS_SCHEMA}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent,
+                                         suffix=".tmp", delete=False) as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(f.name, path)
+    except OSError as e:
+        logger.error(f"Failed to save settings: {e}")
@@ -0,0 +1,279 @@
+"""Per-machine autotuning of the model configuration.
+
+The fastest ``compute_type``, ``cpu_threads`` and ``num_workers`` for a
+model depend on the CPU or GPU (AVX-512 VNNI, core count, cache sizes), so
+instead of hard-coding them a short calibration clip is transcribed with
+every candidate configuration. Each candidate runs in a fresh process,
+which keeps the peak memory measurement honest and survives a compute type
+the hardware rejects or crashes on.
+
+The winner is stored per host, model size and device in
+``~/.autoseg/tuning.json`` together with every candidate's result, so that
+a run can use the fastest candidate measured with as many concurrent
+transcriptions as it runs itself. The GUI and the CLI use it whenever no
+compute type is chosen explicitly.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable
+
+from autoseg_audio import SAMPLE_RATE, decode_audio
+from autoseg_engine import COMPUTE_TYPES, setup_logging, load_whisper_model, transcribe_audio
+
+logger = logging.getLogger("autoseg.tuning")
+
+DEFAULT_TUNING_PATH = Path.home() / ".autoseg" / "tuning.json"
+
+# Length of the calibration clip cut from the start of the given file
+CALIBRATION_SECONDS = 30
+
+# Timed runs per candidate; the best one counts
+CALIBRATION_REPEATS = 2
+
+# Candidates this close to the fastest RTF are considered equally fast,
+# and the one using the least memory wins
+RTF_TOLERANCE = 0.05
+
+TuningConfig = Dict[str, Any]
+
+
+def host_id() -> str:
+    """Name of this machine in the tuning file."""
+    return platform.node() or "localhost"
+
+
+def candidate_configs(device: str, cpu_count: Optional[int] = None) -> List[TuningConfig]:
+    """Configurations worth calibrating on ``device``.
+
+    On CPU, every compute type is tried with all, half and a quarter of the
+    cores, as one worker or as two workers sharing the cores. On CUDA the
+    threads do not matter, only the compute type and the number of workers.
+    """
+    compute_types = COMPUTE_TYPES.get(device, COMPUTE_TYPES['cpu'])
+    if device == "cuda":
+        return [{"compute_type": compute_type, "cpu_threads": 0, "num_workers": workers}
+                for compute_type in compute_types for workers in (1, 2)]
+
+    cpu_count = cpu_count or os.cpu_count() or 1
+    thread_counts = sorted({cpu_count, max(1, cpu_count // 2), max(1, cpu_count // 4)}, reverse=True)
+    configs = []
+    for compute_type in compute_types:
+        for threads in thread_counts:
+            for workers in (1, 2):
+                if threads * workers <= cpu_count:
+                    configs.append({"compute_type": compute_type, "cpu_threads": threads, "num_workers": workers})
+    return configs
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, None where unknown."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _transcribe_clip(model, audio, lang_code: Optional[str], use_vad: bool, beam_size: int) -> int:
+    segments, _ = transcribe_audio(model, audio, lang_code, use_vad, beam_size)
+    return sum(1 for _ in segments)
+
+
+def measure_config(size: str, device: str, config: TuningConfig, audio, lang_code: Optional[str] = None,
+                   use_vad: bool = True, beam_size: int = 5,
+                   repeats: int = CALIBRATION_REPEATS) -> Dict[str, Any]:
+    """Load a model with ``config`` and time it on the calibration clip.
+
+    With ``num_workers`` > 1 the clip is transcribed that many times
+    concurrently, which is how the chunked and multi-stream paths use the
+    workers, and the real-time factor is per audio second processed.
+
+    Returns:
+        ``config`` plus ``load_seconds``, ``seconds`` (best run), ``rtf`` and
+        ``peak_rss_mb``, or an ``error`` if the configuration failed
+    """
+    from autoseg_models import warm_up_model, release_model
+
+    result = dict(config)
+    streams = config["num_workers"]
+    try:
+        start = time.perf_counter()
+        model = load_whisper_model(size, device, config["compute_type"],
+                                   cpu_threads=config["cpu_threads"], num_workers=streams)
+        result["load_seconds"] = time.perf_counter() - start
+        warm_up_model(model)
+
+        best = float("inf")
+        with ThreadPoolExecutor(max_workers=streams) as executor:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                list(executor.map(lambda _: _transcribe_clip(model, audio, lang_code, use_vad, beam_size),
+                                  range(streams)))
+                best = min(best, time.perf_counter() - start)
+        result["seconds"] = best
+        result["rtf"] = best / (len(audio) / SAMPLE_RATE * streams)
+        release_model(model)
+    except Exception as e:
+        logger.warning(f"Candidate {describe_config(config)} failed: {e}")
+        result["error"] = str(e)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _measure_in_worker(*args) -> Dict[str, Any]:
+    setup_logging()
+    return measure_config(*args)
+
+
+def pick_winner(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Fastest successful candidate; near-ties go to the one using less memory."""
+    ok = [result for result in results if "error" not in result]
+    if not ok:
+        return None
+    fastest = min(result["rtf"] for result in ok)
+    close = [result for result in ok if result["rtf"] <= fastest * (1 + RTF_TOLERANCE)]
+    return min(close, key=lambda result: (result["peak_rss_mb"] or 0.0, result["rtf"]))
+
+
+def describe_config(config: TuningConfig) -> str:
+    return f"{config['compute_type']}, {config['cpu_threads']} thread(s), {config['num_workers']} worker(s)"
+
+
+def autotune(size: str, device: str, clip_path: str, lang_code: Optional[str] = None, use_vad: bool = True,
+             beam_size: int = 5, clip_seconds: float = CALIBRATION_SECONDS,
+             configs: Optional[List[TuningConfig]] = None,
+             result_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Calibrate every candidate configuration and return the results.
+
+    Args:
+        size: Model size to tune
+        device: ``cpu`` or ``cuda``
+        clip_path: Media file; its first ``clip_seconds`` are the calibration clip.
+            Use real speech, silence or music decodes far faster than speech.
+        lang_code: Language of the clip, empty for auto-detection
+        use_vad: Whether to enable the VAD filter, as in real runs
+        beam_size: Beam size, as in real runs
+        clip_seconds: Length of the calibration clip
+        configs: Candidates, defaults to ``candidate_configs(device)``
+        result_callback: Receives each candidate's result as soon as it is measured
+
+    Returns:
+        Dict with ``winner`` (a result, or None if every candidate failed),
+        ``results``, ``clip_seconds`` and ``clip``
+    """
+    audio = decode_audio(clip_path)[:int(clip_seconds * SAMPLE_RATE)]
+    configs = configs if configs is not None else candidate_configs(device)
+    logger.info(f"Autotuning {size} on {device}: {len(configs)} candidate(s), "
+                f"{len(audio) / SAMPLE_RATE:.0f}s calibration clip from {clip_path}")
+
+    # spawn gives every candidate a clean interpreter on all platforms
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for config in configs:
+        # A fresh process per candidate: clean peak RSS, and a crash only loses this candidate
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(_measure_in_worker, size, device, config, audio,
+                                         lang_code, use_vad, beam_size).result()
+        except BrokenProcessPool:
+            result = dict(config, error="进程意外退出", peak_rss_mb=None)
+        if "error" not in result:
+            logger.info(f"{describe_config(config)}: RTF {result['rtf']:.3f}, "
+                        f"peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+        results.append(result)
+        if result_callback:
+            result_callback(result)
+
+    return {"winner": pick_winner(results), "results": results,
+            "clip_seconds": len(audio) / SAMPLE_RATE, "clip": str(clip_path)}
+
+
+def _tuning_key(size: str, device: str) -> str:
+    return f"{size}/{device}"
+
+
+def load_tuning(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Read the tuning file; a missing or unreadable file yields an empty dict."""
+    path = Path(path) if path else DEFAULT_TUNING_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable tuning file {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_tuned_config(size: str, device: str, path: Optional[Path] = None, host: Optional[str] = None,
+                      streams: int = 1) -> Optional[TuningConfig]:
+    """The tuned ``compute_type``/``cpu_threads``/``num_workers`` for this host, None if not tuned.
+
+    Candidates are timed with ``num_workers`` transcriptions at once, so the
+    threads of a candidate only fit a run with that many concurrent streams.
+    The fastest candidate measured with ``streams`` workers is returned. If
+    none was, the overall winner's compute type is returned with
+    ``cpu_threads`` 0 (not tuned) and ``num_workers`` set to ``streams``.
+
+    Args:
+        streams: Transcriptions the run keeps going at once, e.g. ``--streams``
+            times ``--chunk-workers``; 1 for a plain serial run
+    """
+    entry = load_tuning(path).get(host or host_id(), {}).get(_tuning_key(size, device))
+    if not isinstance(entry, dict):
+        return None
+    if entry.get("compute_type") not in COMPUTE_TYPES.get(device, []):
+        return None
+    results = entry.get("results")
+    try:
+        measured = [result for result in results if result.get("num_workers") == streams]
+        best = pick_winner(measured) or {}
+    except (TypeError, AttributeError, KeyError):
+        best = {}
+    if best.get("compute_type") not in COMPUTE_TYPES.get(device, []):
+        best = entry if entry.get("num_workers", 1) == streams else {"compute_type": entry["compute_type"]}
+    try:
+        return {"compute_type": best["compute_type"], "cpu_threads": int(best.get("cpu_threads", 0)),
+                "num_workers": streams}
+    except (TypeError, ValueError):
+        return None
+
+
+def save_tuned_config(size: str, device: str, tuning: Dict[str, Any], path: Optional[Path] = None,
+                      host: Optional[str] = None) -> None:
+    """Store the winner of ``autotune`` for this host, replacing any earlier one atomically."""
+    path = Path(path) if path else DEFAULT_TUNING_PATH
+    winner = tuning["winner"]
+    data = load_tuning(path)
+    data.setdefault(host or host_id(), {})[_tuning_key(size, device)] = {
+        "compute_type": winner["compute_type"],
+        "cpu_threads": winner["cpu_threads"],
+        "num_workers": winner["num_workers"],
+        "rtf": winner["rtf"],
+        "peak_rss_mb": winner["peak_rss_mb"],
+        "clip_seconds": tuning["clip_seconds"],
+        "tuned": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": tuning["results"],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent,
+                                     suffix=".tmp", delete=False) as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(f.name, path)
+    logger.info(f"Tuned configuration for {size}/{device} saved to {path}: {describe_config(winner)}")
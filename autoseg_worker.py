@@ -0,0 +1,306 @@
+"""Long-lived transcription worker process for the GUI.
+
+The Whisper models, ffmpeg decoding, transcription and segmentation run in a
+child process. The Tk main loop then never competes with them for the GIL,
+a crash or out-of-memory kill only takes the worker down, and restarting the
+worker returns all of its memory to the OS.
+
+Requests go to the child over one multiprocessing queue. Events come back
+over another as the same ``(message_type, data)`` tuples that the GUI's
+``check_queue`` handles. Decoded audio is not sent through the queue: the
+child hands over the path of its memory-mapped PCM file and the GUI maps the
+same file for playback.
+"""
+import collections
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from typing import Optional, Dict, Any, Tuple, Callable
+
+from autoseg_engine import (
+    PipelineError, JobCancelled, CancellationToken, setup_logging, describe_model_error, process_file
+)
+from autoseg_audio import PCMStore
+from autoseg_metrics import JobMetrics
+
+logger = logging.getLogger("autoseg.worker")
+
+Message = Tuple[str, Any]
+Emit = Callable[[str, Any], None]
+
+# Seconds a cancelled job gets to stop on its own before the worker is restarted
+CANCEL_GRACE_SECONDS = 1.0
+
+# Seconds to wait for the worker to exit cleanly before it is terminated
+SHUTDOWN_TIMEOUT = 2.0
+
+# How often the child checks whether the running job was cancelled
+CANCEL_POLL_SECONDS = 0.1
+
+
+def run_job(model, request: Dict[str, Any], emit: Emit, cancel_token: CancellationToken,
+            transcription_cache=None, audio_cache=None) -> None:
+    """Run ``process_file`` on one queued file, reporting through ``emit``.
+
+    Args:
+        model: Loaded ``WhisperModel``
+        request: ``job``, ``file_path``, ``model_info`` and the transcription settings
+            (``max_duration``, ``lang_code``, ``use_vad``, ``beam_size``, ``segmentation``,
+            ``chunk_workers``)
+        emit: Receives the GUI messages; every job message carries the job id
+        cancel_token: Stops ffmpeg and transcription when cancelled
+        transcription_cache: Optional ``TranscriptionCache``
+        audio_cache: Optional ``AudioCache``
+    """
+    job_id, file_path = request["job"], request["file_path"]
+    metrics = JobMetrics(file_path)
+
+    def hand_over_audio(pcm_store: PCMStore, info) -> None:
+        # The GUI maps the same file now, so segments can be played while decoding continues
+        emit("transcribing", {"job": job_id, "detected_lang": info.language, "audio": pcm_store.hand_over()})
+
+    try:
+        result = process_file(
+            model, file_path, request["max_duration"], request["lang_code"], request["use_vad"],
+            request["beam_size"],
+            status_callback=lambda message: emit("status", message),
+            segment_callback=lambda segment: emit("segment", (job_id, segment)),
+            cache=transcription_cache, model_info=request.get("model_info"), audio_cache=audio_cache,
+            chunk_workers=request.get("chunk_workers", 1), segmentation=request["segmentation"],
+            metrics=metrics, cancel_token=cancel_token,
+            progress_callback=lambda progress: emit("progress", progress),
+            audio_callback=hand_over_audio
+        )
+        emit("success", {"job": job_id, "detected_lang": result["detected_lang"], "segments": result["segments"]})
+
+    except JobCancelled:
+        logger.info(f"Processing cancelled: {file_path}")
+        metrics.cancelled = True
+        emit("cancelled", job_id)
+
+    except PipelineError as e:
+        logger.error(str(e))
+        metrics.error = str(e)
+        emit("job_error", {"job": job_id, "error": str(e)})
+
+    except Exception as e:
+        error_msg = f"处理过程中发生未知错误: {e}"
+        logger.error(f"Unexpected error in processing: {e}")
+        logger.error(traceback.format_exc())
+        metrics.error = error_msg
+        emit("job_error", {"job": job_id, "error": error_msg})
+
+    finally:
+        emit("metrics", metrics.to_dict())
+
+
+def _open_caches() -> Tuple[Any, Any]:
+    """The worker's own handles on the GUI's caches, None where unavailable."""
+    from autoseg_cache import TranscriptionCache, AudioCache
+
+    caches = []
+    for factory in (TranscriptionCache, AudioCache):
+        try:
+            caches.append(factory())
+        except Exception as e:
+            logger.warning(f"{factory.__name__} disabled in worker: {e}")
+            caches.append(None)
+    return caches[0], caches[1]
+
+
+def _worker_main(requests, events, cancel_job_id) -> None:
+    """Entry point of the child process: serve requests until ``shutdown``."""
+    from autoseg_models import ModelPool, warm_up_model
+
+    setup_logging()
+    pool = ModelPool()
+    transcription_cache, audio_cache = _open_caches()
+    current: Dict[str, Any] = {"job": None, "token": None}
+    # num_workers of each model as loaded; a long file is transcribed as that many parallel chunks
+    model_workers: Dict[Tuple[str, str, str], int] = {}
+
+    def emit(message_type: str, data: Any = None) -> None:
+        events.put((message_type, data))
+
+    def watch_cancel() -> None:
+        # Values only change between jobs, so a stale read costs at most one poll
+        while True:
+            time.sleep(CANCEL_POLL_SECONDS)
+            token = current["token"]
+            if token is not None and cancel_job_id.value == current["job"]:
+                token.cancel()
+
+    threading.Thread(target=watch_cancel, daemon=True, name="autoseg-cancel").start()
+    logger.info("Transcription worker started")
+
+    while True:
+        kind, data = requests.get()
+        if kind == "shutdown":
+            break
+
+        if kind == "load_model":
+            try:
+                pool.set_budget(data["pool_bytes"])
+                key = (data["size"], data["device"], data["compute_type"])
+                workers = data.get("options", {}).get("num_workers", 1)
+                if key in pool and model_workers.get(key, 1) != workers:
+                    # The chunk setting changed; CTranslate2 workers are fixed at load time
+                    pool.release(*key)
+                fresh = key not in pool
+                start = time.perf_counter()
+                # Options such as the tuned cpu_threads only apply when the model is loaded
+                model = pool.get(*key, **data.get("options", {}))
+                # A resident model counts as loaded instantly
+                load_seconds = time.perf_counter() - start
+                if fresh:
+                    model_workers[key] = workers
+                    emit("status", "模型预热中...")
+                    warm_up_model(model)
+                logger.info("Model loaded successfully")
+                emit("model_loaded", {"size": data["size"], "device": data["device"],
+                                      "compute_type": data["compute_type"], "load_seconds": load_seconds,
+                                      "resident": len(pool.keys())})
+            except Exception as e:
+                logger.error(f"Model loading failed: {e}")
+                logger.error(traceback.format_exc())
+                emit("error", describe_model_error(e))
+
+        elif kind == "process":
+            info = data["model_info"]
+            key = (info["size"], info["device"], info["compute_type"])
+            if key not in pool:
+                emit("job_error", {"job": data["job"], "error": "模型未加载，请重新加载模型"})
+                continue
+            current["token"] = CancellationToken()
+            current["job"] = data["job"]
+            try:
+                request = dict(data, chunk_workers=model_workers.get(key, 1))
+                run_job(pool.get(*key), request, emit, current["token"], transcription_cache, audio_cache)
+            finally:
+                current["job"], current["token"] = None, None
+
+    pool.release_all()
+    logger.info("Transcription worker stopped")
+
+
+class TranscriptionWorker:
+    """Parent-side handle on the worker process.
+
+    The model configuration last requested is remembered, so ``restart``
+    can bring the worker back with the same model after a hard cancel or a
+    crash.
+    """
+
+    def __init__(self):
+        # Forking a process that runs Tk and its threads is unsafe; spawn behaves the same on all platforms
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._load_request: Optional[Dict[str, Any]] = None
+        # Events a stopped worker left behind, delivered before the new worker's
+        self._backlog: collections.deque = collections.deque()
+        self.start()
+
+    def start(self) -> None:
+        """Start a fresh worker process with new queues."""
+        # Queues are not reused: terminating a process can leave a queue corrupted
+        self._requests = self._context.Queue()
+        self._events = self._context.Queue()
+        self._cancel_job_id = self._context.Value('i', 0, lock=False)
+        self._process = self._context.Process(
+            target=_worker_main,
+            args=(self._requests, self._events, self._cancel_job_id),
+            name="autoseg-worker",
+            daemon=True
+        )
+        self._process.start()
+        logger.info(f"Transcription worker started (pid {self._process.pid})")
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def load_model(self, size: str, device: str, compute_type: str, pool_bytes: int,
+                   options: Optional[Dict[str, Any]] = None) -> None:
+        """Load (or switch to) a model; answered by ``model_loaded`` or ``error``.
+
+        Args:
+            options: Extra ``WhisperModel`` arguments such as ``cpu_threads``
+        """
+        self._load_request = {"size": size, "device": device, "compute_type": compute_type,
+                              "pool_bytes": pool_bytes, "options": options or {}}
+        self._requests.put(("load_model", self._load_request))
+
+    def process(self, request: Dict[str, Any]) -> None:
+        """Queue a job; see ``run_job`` for the request keys."""
+        self._requests.put(("process", request))
+
+    def cancel(self, job_id: int) -> None:
+        """Ask the worker to stop ``job_id`` at the next opportunity."""
+        self._cancel_job_id.value = job_id
+
+    def poll(self) -> Message:
+        """Return the next event without blocking.
+
+        Handed-over audio arrives as a ``PCMStore`` mapped in this process.
+
+        Raises:
+            queue.Empty: If no event is waiting
+        """
+        if self._backlog:
+            message_type, data = self._backlog.popleft()
+        else:
+            message_type, data = self._events.get_nowait()
+        if message_type == "transcribing":
+            try:
+                data["audio"] = PCMStore(**data["audio"])
+            except (OSError, ValueError, PipelineError) as e:
+                logger.error(f"Cannot map the worker's audio: {e}")
+                data["audio"] = None
+        return message_type, data
+
+    def restart(self, reload_model: bool = True, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Replace the worker process, reloading the last model unless told otherwise.
+
+        Args:
+            reload_model: Send the last ``load_model`` request to the new worker
+            timeout: Seconds the old worker gets to exit; 0 terminates a stuck worker right away
+        """
+        self.stop(timeout)
+        self.start()
+        if reload_model and self._load_request:
+            self._requests.put(("load_model", self._load_request))
+
+    def release_models(self) -> None:
+        """Free every model by restarting the worker without one."""
+        self._load_request = None
+        self.restart(reload_model=False)
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """Ask the worker to exit, terminating it if it does not within ``timeout``."""
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._requests.put(("shutdown", None))
+            except (OSError, ValueError):
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                logger.warning("Transcription worker did not exit, terminating it")
+                self._process.terminate()
+                self._process.join(SHUTDOWN_TIMEOUT)
+        # Keep what was already sent, e.g. audio handed over for playback
+        while True:
+            try:
+                self._backlog.append(self._events.get(timeout=0.1))
+            except queue.Empty:
+                break
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"Dropping unreadable worker events: {e}")
+                break
+        for q in (self._requests, self._events):
+            q.cancel_join_thread()
+            q.close()
+        self._process = None
@@ -0,0 +1,170 @@
+"""Micro-benchmarks for the segmentation and export hot paths.
+
+Usage::
+
+    python benchmarks/bench_micro.py                      # run, print, write results JSON
+    python benchmarks/bench_micro.py --quick              # skip the 1M-word cases
+    python benchmarks/bench_micro.py --compare            # fail on regressions vs the baseline
+    python benchmarks/bench_micro.py --save-baseline      # store this run as the new baseline
+
+Each case runs on a synthetic transcript (see ``synthetic.py``) of a given
+size, language and punctuation density. Timings are the best of several
+repeats. ``--compare`` exits with status 1 when a case got slower than the
+baseline by more than ``--tolerance``, so it can gate a CI or farm rollout.
+Baselines are machine specific; regenerate them on the reference host.
+"""
+import argparse
+import io
+import json
+import logging
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from autoseg_engine import format_result_row, write_json, write_srt, write_txt
+from autoseg_segmentation import (
+    WordArrays, iter_smart_segments, optimal_segment_word_arrays, perform_smart_segmentation
+)
+from synthetic import make_segments, make_words
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULTS = BENCH_DIR / "results" / "micro.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline_micro.json"
+
+SIZES = (1_000, 100_000, 1_000_000)
+# (language, punctuation density); the first corpus is the only one run at 1M words
+CORPORA = (("en", 0.08), ("en", 0.005), ("zh", 0.1), ("ja", 0.08), ("ar", 0.05))
+MAX_DURATION = 60
+
+# The DP segmenter is linear but with a large constant; keep the suite quick
+OPTIMAL_MAX_WORDS = 100_000
+
+# Differences below this are noise whatever the ratio
+MIN_REGRESSION_SECONDS = 0.002
+
+
+def repeats_for(words: int) -> int:
+    return 1 if words >= 1_000_000 else 5 if words >= 100_000 else 30
+
+
+def best_of(func: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_display(segments: List[dict]) -> List[tuple]:
+    """The per-segment string work of the GUI results list, without Tk."""
+    return [format_result_row(i + 1, seg) for i, seg in enumerate(segments)]
+
+
+def cases(words_count: int, segments: list, arrays: WordArrays, result: dict) -> Dict[str, Callable[[], object]]:
+    """Benchmarked callables for one corpus."""
+    fns = {
+        "segment/streaming": lambda: list(iter_smart_segments(segments, MAX_DURATION)),
+        "export/srt": lambda: write_srt(io.StringIO(), result["segments"]),
+        "export/txt": lambda: write_txt(io.StringIO(), result["segments"], "bench.wav", "base", "cpu", "int8"),
+        "export/json": lambda: write_json(io.StringIO(), result, "base", "cpu", "int8"),
+        "display/format": lambda: format_display(result["segments"]),
+    }
+    if words_count <= OPTIMAL_MAX_WORDS:
+        fns["segment/optimal_arrays"] = lambda: optimal_segment_word_arrays(arrays, MAX_DURATION)
+    return fns
+
+
+def run(sizes: Tuple[int, ...]) -> Dict[str, dict]:
+    results = {}
+    for words_count in sizes:
+        corpora = CORPORA if words_count < 1_000_000 else CORPORA[:1]
+        for language, density in corpora:
+            words = make_words(words_count, seed=words_count, language=language, punct_density=density)
+            segments = make_segments(words, seed=words_count)
+            arrays = WordArrays.from_segments(segments)
+            result = {
+                "file_path": "bench.wav",
+                "detected_lang": language,
+                "duration": words[-1].end,
+                "segments": perform_smart_segmentation(segments, MAX_DURATION),
+            }
+            for name, func in cases(words_count, segments, arrays, result).items():
+                key = f"{name}/{language}-{density}/{words_count}"
+                seconds = best_of(func, repeats_for(words_count))
+                results[key] = {"seconds": seconds, "words": words_count,
+                                "ns_per_word": seconds / words_count * 1e9}
+                print(f"{key:<48} {seconds * 1000:>10.2f} ms {results[key]['ns_per_word']:>9.0f} ns/word")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Return descriptions of the cases that regressed beyond ``tolerance``."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if not base:
+            continue
+        ratio = current["seconds"] / base["seconds"] if base["seconds"] else 1.0
+        slower_by = current["seconds"] - base["seconds"]
+        if ratio > 1 + tolerance and slower_by > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{key}: {base['seconds'] * 1000:.2f} ms -> {current['seconds'] * 1000:.2f} ms "
+                               f"({ratio:.2f}x)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Segmentation and export micro-benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Skip the 1M-word cases")
+    parser.add_argument("--output", default=str(DEFAULT_RESULTS), help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON to compare against")
+    parser.add_argument("--compare", action="store_true", help="Exit 1 if any case regressed")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline (default: 0.25)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results as the baseline")
+    args = parser.parse_args()
+    # Segmentation logs a line per run; keep the table readable
+    logging.basicConfig(level=logging.WARNING)
+
+    sizes = tuple(s for s in SIZES if not (args.quick and s >= 1_000_000))
+    results = run(sizes)
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(document, indent=2), encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.compare:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}; run with --save-baseline first")
+            return 1
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
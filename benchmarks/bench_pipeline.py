@@ -0,0 +1,186 @@
+"""End-to-end benchmark of the GUI pipeline stages with a fake model.
+
+Usage::
+
+    python benchmarks/bench_pipeline.py [--lengths 60 600 3600] [--source tone|noise]
+                                        [--model fake_model:FakeWhisperModel] [--model-rtf 0.0]
+
+Test audio is generated locally with ffmpeg (a 44.1 kHz stereo MP3 of a tone
+or noise), so the run is offline and reproducible. The stages mirror
+``autoseg_engine.process_file`` as the GUI worker runs it:
+
+1. decode: ffmpeg conversion into the memory-mapped PCM store
+2. load: float32 waveform for Whisper
+3. transcribe: consuming the model's segment generator
+4. segment: smart segmentation
+
+For each stage the wall time, the peak resident set size while it ran and
+the real-time factor (stage seconds per audio second) are reported. Any
+class with a faster-whisper style ``transcribe()`` can be plugged in with
+``--model module:Class``.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from autoseg_audio import PCMStore
+from autoseg_engine import segment_transcription, transcribe_audio
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULTS = BENCH_DIR / "results" / "pipeline.json"
+
+SOURCES = {
+    "tone": "sine=frequency=440:sample_rate=44100:duration={seconds}",
+    "noise": "anoisesrc=color=pink:sample_rate=44100:amplitude=0.3:duration={seconds}",
+}
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes, 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+class PeakRSS:
+    """Samples RSS on a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakRSS":
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def generate_audio(directory: Path, seconds: int, source: str) -> Path:
+    """Render ``seconds`` of test audio to an MP3 with ffmpeg."""
+    path = directory / f"{source}_{seconds}s.mp3"
+    if not path.exists():
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-f", "lavfi",
+             "-i", SOURCES[source].format(seconds=seconds), "-ac", "2", "-b:a", "128k", str(path)],
+            check=True
+        )
+    return path
+
+
+def load_model_factory(spec: str) -> Callable[..., Any]:
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "FakeWhisperModel")
+
+
+def run_stage(stages: List[Dict[str, Any]], name: str, audio_seconds: float, func: Callable[[], Any]) -> Any:
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+    stages.append({
+        "stage": name,
+        "seconds": elapsed,
+        "peak_rss_mb": rss.peak / (1024 * 1024),
+        "rtf": elapsed / audio_seconds,
+    })
+    return value
+
+
+def run_pipeline(model, path: Path, audio_seconds: float, max_duration: int) -> List[Dict[str, Any]]:
+    stages: List[Dict[str, Any]] = []
+    store = run_stage(stages, "decode", audio_seconds, lambda: PCMStore.decode(str(path)))
+    try:
+        audio = run_stage(stages, "load", audio_seconds, store.to_float32)
+
+        def transcribe() -> Tuple[list, Any]:
+            segments, info = transcribe_audio(model, audio, "en", True, 5)
+            return list(segments), info
+
+        segments, _ = run_stage(stages, "transcribe", audio_seconds, transcribe)
+        del audio
+        run_stage(stages, "segment", audio_seconds, lambda: segment_transcription(segments, max_duration))
+    finally:
+        store.close()
+    total = sum(stage["seconds"] for stage in stages)
+    stages.append({
+        "stage": "total",
+        "seconds": total,
+        "peak_rss_mb": max(stage["peak_rss_mb"] for stage in stages),
+        "rtf": total / audio_seconds,
+    })
+    return stages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with a fake model")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[60, 600, 3600],
+                        help="Audio lengths in seconds (default: 60 600 3600)")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="tone")
+    parser.add_argument("--model", default="fake_model:FakeWhisperModel",
+                        help="module:Class of the stand-in model (default: fake_model:FakeWhisperModel)")
+    parser.add_argument("--model-rtf", type=float, default=0.0,
+                        help="Simulated inference seconds per audio second for the fake model")
+    parser.add_argument("--max-duration", type=int, default=60)
+    parser.add_argument("--audio-dir", help="Keep generated audio here between runs")
+    parser.add_argument("--output", default=str(DEFAULT_RESULTS), help="Where to write the results JSON")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    factory = load_model_factory(args.model)
+    model = factory(rtf=args.model_rtf) if args.model_rtf else factory()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_dir = Path(args.audio_dir) if args.audio_dir else Path(tmp)
+        audio_dir.mkdir(parents=True, exist_ok=True)
+
+        runs = []
+        print(f"{'audio':>8} {'stage':>11} {'wall s':>9} {'peak RSS MB':>12} {'RTF':>9}")
+        for seconds in args.lengths:
+            path = generate_audio(audio_dir, seconds, args.source)
+            stages = run_pipeline(model, path, seconds, args.max_duration)
+            runs.append({"audio_seconds": seconds, "source": args.source, "stages": stages})
+            for stage in stages:
+                print(f"{seconds:>7}s {stage['stage']:>11} {stage['seconds']:>9.3f} "
+                      f"{stage['peak_rss_mb']:>12.1f} {stage['rtf']:>9.5f}")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"model": args.model, "model_rtf": args.model_rtf, "runs": runs}, indent=2),
+                      encoding="utf-8")
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
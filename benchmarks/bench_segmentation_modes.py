@@ -0,0 +1,91 @@
+"""Compare the greedy and optimal segmenters on synthetic transcripts.
+
+Usage::
+
+    python benchmarks/bench_segmentation_modes.py [--words 10000 100000] [--max-duration 60]
+
+Speed is the end-to-end time from Whisper segments, as ``process_file``
+runs each mode. Quality is
+reported as the spread of segment lengths, the share of very short segments
+and the share of segments ending at a natural boundary (sentence-ending
+punctuation or a pause of more than ``PAUSE_SECONDS``).
+
+The optimal mode exists to give more even segments, so the run fails (exit
+status 1) when its length spread (coefficient of variation) is larger than
+the greedy mode's on any transcript.
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from autoseg_segmentation import (
+    ALL_PUNCTUATION, PAUSE_SECONDS, WordArrays, perform_smart_segmentation, perform_optimal_segmentation
+)
+from synthetic import make_words, make_segments
+
+MODES = {
+    "greedy": perform_smart_segmentation,
+    "optimal": perform_optimal_segmentation,
+}
+
+
+def segment_quality(segments, words: WordArrays, max_duration: int) -> dict:
+    """Length statistics and boundary quality of a segmentation."""
+    lengths = [seg["end"] - seg["start"] for seg in segments]
+    next_start = {}
+    for start, end in zip(words.starts[1:], words.ends[:-1]):
+        next_start.setdefault(float(end), float(start))
+    natural = sum(
+        1 for seg in segments
+        if seg["text"][-1] in ALL_PUNCTUATION
+        or next_start.get(seg["end"], seg["end"]) - seg["end"] > PAUSE_SECONDS
+    )
+    mean = statistics.fmean(lengths)
+    return {
+        "segments": len(segments),
+        "mean_sec": mean,
+        "cv": statistics.pstdev(lengths) / mean if mean else 0.0,
+        "short_share": sum(1 for n in lengths if n < max_duration / 4) / len(lengths),
+        "natural_share": natural / len(segments),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--max-duration", type=int, default=60)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--punct-density", type=float, default=0.03)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'words':>9} {'mode':>8} {'time':>9} {'segs':>6} {'mean s':>7} {'cv':>6} {'short':>6} {'natural':>8}")
+    failures = []
+    for count in args.words:
+        cv = {}
+        whisper_segments = make_segments(make_words(count, language=args.language, punct_density=args.punct_density))
+        words = WordArrays.from_segments(whisper_segments)
+        for name, segment in MODES.items():
+            start = time.perf_counter()
+            segments = segment(whisper_segments, args.max_duration)
+            elapsed = time.perf_counter() - start
+            q = segment_quality(segments, words, args.max_duration)
+            cv[name] = q["cv"]
+            print(f"{count:>9} {name:>8} {elapsed * 1000:>7.1f}ms {q['segments']:>6} {q['mean_sec']:>7.1f} "
+                  f"{q['cv']:>6.3f} {q['short_share']:>6.1%} {q['natural_share']:>8.1%}")
+        if cv["optimal"] > cv["greedy"]:
+            failures.append(f"{count} words: optimal cv {cv['optimal']:.3f} > greedy cv {cv['greedy']:.3f}")
+
+    for line in failures:
+        print(f"FAIL {line}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Import-time budget check for the GUI startup path.
+
+Usage::
+
+    python benchmarks/check_import_time.py                 # check against the default budget
+    python benchmarks/check_import_time.py --budget 0.5    # seconds allowed for ``import autoseg``
+    python benchmarks/check_import_time.py --profile       # also print the slowest imports
+
+Every run happens in a fresh interpreter, so nothing is already cached in
+``sys.modules``. Two things are checked:
+
+1. ``import autoseg`` takes no longer than ``--budget`` seconds (best of
+   ``--repeats``), so the window can appear within a few hundred ms.
+2. None of the heavy modules (torch, faster-whisper, CTranslate2, NumPy,
+   pydub, ttkthemes) is imported along the way. They load on first use.
+
+Device probing (``detect_devices``) is timed as well and has its own budget,
+since the GUI calls it before the window is shown.
+
+Exits with status 1 when a check fails, so it can gate a CI job.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be loaded by ``import autoseg``
+HEAVY_MODULES = ("torch", "faster_whisper", "ctranslate2", "numpy", "pydub", "ttkthemes", "PIL")
+
+DEFAULT_IMPORT_BUDGET = 0.3
+DEFAULT_PROBE_BUDGET = 0.5
+
+# Runs in the child interpreter; prints one JSON line
+PROBE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import autoseg
+imported = time.perf_counter() - start
+modules = [m for m in %r if m in sys.modules]
+start = time.perf_counter()
+devices = autoseg.detect_devices()
+probed = time.perf_counter() - start
+print(json.dumps({"import": imported, "probe": probed, "devices": devices,
+                  "modules": modules}))
+"""
+
+
+def run_python(args: List[str], workdir: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    # autoseg writes logs/ relative to the working directory, keep that out of the checkout
+    return subprocess.run([sys.executable] + args, cwd=workdir, env=env, capture_output=True, text=True,
+                          check=True)
+
+
+def measure_once(workdir: str) -> Dict[str, Any]:
+    """Import autoseg in a fresh interpreter and report what it cost."""
+    output = run_python(["-c", PROBE_SCRIPT % (HEAVY_MODULES,)], workdir).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int, workdir: str) -> List[str]:
+    """The ``limit`` imports with the largest cumulative time, from ``-X importtime``."""
+    result = run_python(["-X", "importtime", "-c", "import autoseg"], workdir)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return [f"{micros / 1000:>8.1f} ms {name}" for micros, name in rows[:limit]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import time of the GUI module")
+    parser.add_argument("--budget", type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help=f"Seconds allowed for 'import autoseg' (default: {DEFAULT_IMPORT_BUDGET})")
+    parser.add_argument("--probe-budget", type=float, default=DEFAULT_PROBE_BUDGET,
+                        help=f"Seconds allowed for device probing (default: {DEFAULT_PROBE_BUDGET})")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters to try (default: 5)")
+    parser.add_argument("--profile", action="store_true", help="Print the slowest imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [measure_once(workdir) for _ in range(args.repeats)]
+        profile = slowest_imports(15, workdir) if args.profile else []
+    import_seconds = min(run["import"] for run in runs)
+    probe_seconds = min(run["probe"] for run in runs)
+    heavy = sorted({module for run in runs for module in run["modules"]})
+
+    print(f"import autoseg   {import_seconds * 1000:>8.1f} ms (budget {args.budget * 1000:.0f} ms)")
+    print(f"detect_devices   {probe_seconds * 1000:>8.1f} ms (budget {args.probe_budget * 1000:.0f} ms) "
+          f"-> {runs[0]['devices']}")
+    if profile:
+        print("Slowest imports (cumulative):")
+        for line in profile:
+            print(f"  {line}")
+
+    failures = []
+    if import_seconds > args.budget:
+        failures.append(f"import took {import_seconds:.3f}s, over the {args.budget:.3f}s budget")
+    if probe_seconds > args.probe_budget:
+        failures.append(f"device probing took {probe_seconds:.3f}s, over the {args.probe_budget:.3f}s budget")
+    if heavy:
+        failures.append(f"heavy modules imported eagerly: {', '.join(heavy)}")
+    for line in failures:
+        print(f"FAIL {line}")
+    if failures:
+        return 1
+    print("Import-time budget met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Deterministic stand-in for ``faster_whisper.WhisperModel``.
+
+It never looks at the audio content: it emits a fixed word pattern at a set
+speaking rate over the audio's duration, optionally sleeping to mimic a
+model with a given real-time factor. Good enough to exercise everything
+around inference without weights or a GPU.
+"""
+import collections
+import time
+
+Word = collections.namedtuple("Word", "start end word probability")
+Segment = collections.namedtuple("Segment", "id seek start end text words")
+TranscriptionInfo = collections.namedtuple(
+    "TranscriptionInfo", "language language_probability duration duration_after_vad"
+)
+
+SAMPLE_RATE = 16000
+
+
+class FakeWhisperModel:
+    """Yields ``words_per_second`` words per second of audio, 12 per segment."""
+
+    def __init__(self, words_per_second: float = 2.5, rtf: float = 0.0, punct_every: int = 11,
+                 words_per_segment: int = 12):
+        """
+        Args:
+            words_per_second: Speaking rate of the generated transcript
+            rtf: Seconds of simulated compute per second of audio
+            punct_every: Every n-th word ends a sentence
+            words_per_segment: Words per Whisper segment
+        """
+        self.words_per_second = words_per_second
+        self.rtf = rtf
+        self.punct_every = punct_every
+        self.words_per_segment = words_per_segment
+
+    def transcribe(self, audio, language=None, **kwargs):
+        duration = len(audio) / SAMPLE_RATE
+        step = 1.0 / self.words_per_second
+        info = TranscriptionInfo(language or "en", 1.0, duration, duration)
+
+        def segments():
+            count = int(duration * self.words_per_second)
+            words = []
+            seg_id = 0
+            for k in range(count):
+                start = k * step
+                text = f" w{k}" + ("." if (k + 1) % self.punct_every == 0 else "")
+                words.append(Word(round(start, 2), round(start + step * 0.8, 2), text, 0.95))
+                if len(words) == self.words_per_segment or k == count - 1:
+                    if self.rtf:
+                        time.sleep((words[-1].end - words[0].start) * self.rtf)
+                    yield Segment(seg_id, 0, words[0].start, words[-1].end, "".join(w.word for w in words), words)
+                    seg_id += 1
+                    words = []
+
+        return segments(), info
@@ -0,0 +1,63 @@
+"""Deterministic synthetic transcripts for the benchmarks.
+
+Words mimic faster-whisper output closely enough for segmentation and the
+writers: ``start``/``end``/``word``/``probability`` attributes, words grouped
+into segments, occasional long pauses and sentence-ending punctuation.
+"""
+import collections
+import random
+from typing import List
+
+Word = collections.namedtuple("Word", "start end word probability")
+Segment = collections.namedtuple("Segment", "start end text words")
+
+# Vocabulary and punctuation per language; CJK words carry no leading space
+LANGUAGES = {
+    "en": ([" the", " model", " speech", " segment", " audio", " time", " we", " said"], ".?!", ","),
+    "zh": (["我们", "模型", "语音", "分段", "音频", "时间", "今天", "说"], "。？！", "，"),
+    "ja": (["私", "モデル", "音声", "区切り", "時間", "です", "ます", "話"], "。？！", "、"),
+    "es": ([" el", " modelo", " voz", " segmento", " audio", " tiempo", " dijo", " hoy"], ".?!", ","),
+    "ar": ([" في", " النموذج", " الصوت", " الوقت", " قال", " اليوم", " من", " على"], ".؟!", "،"),
+}
+
+
+def make_words(count: int, seed: int = 0, language: str = "en", punct_density: float = 0.08) -> List[Word]:
+    """Generate ``count`` words at a natural speaking rate.
+
+    Args:
+        count: Number of words
+        seed: Random seed, equal seeds give equal transcripts
+        language: Key of ``LANGUAGES``
+        punct_density: Probability that a word ends a sentence
+    """
+    rng = random.Random(seed)
+    vocabulary, endings, commas = LANGUAGES[language]
+    words = []
+    t = 0.0
+    for _ in range(count):
+        roll = rng.random()
+        # Mostly tight speech, sometimes a breath, rarely a long pause
+        gap = 0.02 if roll < 0.8 else rng.choice([0.1, 0.3, 0.6, 1.2, 3.0])
+        start = t + gap
+        end = start + rng.uniform(0.12, 0.6)
+        text = rng.choice(vocabulary)
+        roll = rng.random()
+        if roll < punct_density:
+            text += rng.choice(endings)
+        elif roll < punct_density * 2:
+            text += commas
+        words.append(Word(round(start, 2), round(end, 2), text, round(rng.uniform(0.5, 1.0), 3)))
+        t = end
+    return words
+
+
+def make_segments(words: List[Word], seed: int = 0) -> List[Segment]:
+    """Group words into Whisper-like segments of 4-20 words."""
+    rng = random.Random(seed)
+    segments = []
+    i = 0
+    while i < len(words):
+        group = words[i:i + rng.randint(4, 20)]
+        segments.append(Segment(group[0].start, group[-1].end, "".join(w.word for w in group), group))
+        i += len(group)
+    return segments
@@ -43,7 +43,7 @@ fi
 echo -e "${BLUE}[信息] 正在检查依赖库...${NC}"
 
 # 检查依赖库
-if ! $PYTHON_CMD -c "import sys; sys.path.insert(0, '.'); from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" 2>/dev/null; then
+if ! $PYTHON_CMD -c "import sys; sys.path.insert(0, '.'); from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" 2>/dev/null; then
     echo -e "${YELLOW}[警告] 缺少必要的依赖库${NC}"
     echo -e "${BLUE}[信息] 正在尝试自动安装依赖库...${NC}"
     echo
@@ -57,15 +57,12 @@ if ! $PYTHON_CMD -c "import sys; sys.path.insert(0, '.'); from autoseg import ch
     echo "安装 pydub..."
     $PIP_CMD install pydub
     
-    echo "安装 torch..."
-    $PIP_CMD install torch
-    
     echo "安装 ttkthemes (可选，用于更好的界面主题)..."
     $PIP_CMD install ttkthemes
     
     echo
     echo -e "${BLUE}[信息] 依赖库安装完成，正在重新检查...${NC}"
-    if ! $PYTHON_CMD -c "import sys; sys.path.insert(0, '.'); from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" 2>/dev/null; then
+    if ! $PYTHON_CMD -c "import sys; sys.path.insert(0, '.'); from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" 2>/dev/null; then
         echo -e "${RED}[错误] 依赖库安装失败，请手动安装${NC}"
         exit 1
     fi
@@ -48,7 +48,7 @@ if errorlevel 1 (
 :: 测试3: 检查依赖库
 echo.
 echo [测试3] 检查依赖库...
-python -c "from autoseg import check_dependencies; print('✓ 依赖库检查通过' if check_dependencies() else '✗ 依赖库缺失')" 2>nul
+python -c "from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; print('✗ 依赖库缺失' if find_missing_dependencies(GUI_DEPENDENCIES) else '✓ 依赖库检查通过')" 2>nul
 if errorlevel 1 (
     echo ✗ 依赖库检查失败
     goto :failed
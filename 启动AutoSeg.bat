@@ -29,7 +29,7 @@ if not exist "autoseg.py" (
 echo [信息] 正在检查依赖库...
 
 :: 检查依赖库
-python -c "import sys; sys.path.insert(0, '.'); from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)" >nul 2>&1
+python -c "import sys; sys.path.insert(0, '.'); from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)" >nul 2>&1
 if errorlevel 1 (
     echo [警告] 缺少必要的依赖库
     echo [信息] 正在尝试自动安装依赖库...
@@ -44,15 +44,12 @@ if errorlevel 1 (
     echo 安装 pydub...
     pip install pydub
     
-    echo 安装 torch...
-    pip install torch
-    
     echo 安装 ttkthemes (可选，用于更好的界面主题)...
     pip install ttkthemes
     
     echo.
     echo [信息] 依赖库安装完成，正在重新检查...
-    python -c "import sys; sys.path.insert(0, '.'); from autoseg import check_dependencies; exit(0 if check_dependencies() else 1)"
+    python -c "import sys; sys.path.insert(0, '.'); from autoseg_engine import GUI_DEPENDENCIES, find_missing_dependencies; sys.exit(1 if find_missing_dependencies(GUI_DEPENDENCIES) else 0)"
     if errorlevel 1 (
         echo [错误] 依赖库安装失败，请手动安装
         pause